@@ -0,0 +1,42 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c8e5f1a7b94'
+down_revision: Union[str, None] = '9b2f4c7d1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, timestamp column, fallback for NULLs) of the keyset paginated tables (see e7b3d6a25c81)
+TIMESTAMPS = [
+    ('likes', 'created_at', 'updated_at'),
+    ('matches', 'created_at', 'updated_at'),
+    ('chats', 'created_at', 'updated_at'),
+    ('messages', 'sent_at', 'created_at'),
+    ('notifications', 'created_at', 'updated_at'),
+]
+
+
+def upgrade() -> None:
+    # Cursors encode the timestamp of a row, so it must be set on every row
+    for table, column, fallback in TIMESTAMPS:
+        op.execute(f"UPDATE {table} SET {column} = COALESCE({fallback}, CURRENT_TIMESTAMP) WHERE {column} IS NULL")
+        op.alter_column(
+            table, column,
+            existing_type=sa.TIMESTAMP(timezone=True),
+            existing_server_default=sa.func.now(),
+            nullable=False
+        )
+
+
+def downgrade() -> None:
+    for table, column, _ in TIMESTAMPS:
+        op.alter_column(
+            table, column,
+            existing_type=sa.TIMESTAMP(timezone=True),
+            existing_server_default=sa.func.now(),
+            nullable=True
+        )
@@ -0,0 +1,23 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6c2a9d1e47'
+down_revision: Union[str, None] = 'b99da7df9f29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_recommendations_user_status_score',
+        'recommendations',
+        ['user_id', 'status', 'recommendation_score']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recommendations_user_status_score', table_name='recommendations')
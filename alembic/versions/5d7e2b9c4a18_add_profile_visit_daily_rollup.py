@@ -0,0 +1,44 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d7e2b9c4a18'
+down_revision: Union[str, None] = '8a41d0c5b2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'profile_visit_daily',
+        sa.Column('visited_profile_user_id', sa.Integer(), sa.ForeignKey('users.user_id'), nullable=False),
+        sa.Column('visitor_user_id', sa.Integer(), sa.ForeignKey('users.user_id'), nullable=False),
+        sa.Column('visit_date', sa.Date(), nullable=False),
+        sa.Column('visit_count', sa.Integer(), nullable=False),
+        sa.Column('last_visit_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('visited_profile_user_id', 'visitor_user_id', 'visit_date')
+    )
+
+    # Seed the rollup from the visits logged so far, so purging them later loses nothing
+    op.execute(
+        """
+        INSERT INTO profile_visit_daily
+            (visited_profile_user_id, visitor_user_id, visit_date, visit_count, last_visit_at)
+        SELECT visited_profile_user_id, visitor_user_id,
+               CAST(visit_timestamp AT TIME ZONE 'UTC' AS DATE), COUNT(*), MAX(visit_timestamp)
+        FROM profile_visits
+        WHERE visited_profile_user_id IS NOT NULL
+          AND visitor_user_id IS NOT NULL
+          AND visit_timestamp IS NOT NULL
+        GROUP BY visited_profile_user_id, visitor_user_id, CAST(visit_timestamp AT TIME ZONE 'UTC' AS DATE)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('profile_visit_daily')
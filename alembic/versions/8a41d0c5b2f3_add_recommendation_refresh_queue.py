@@ -0,0 +1,33 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a41d0c5b2f3'
+down_revision: Union[str, None] = '3f6c2a9d1e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'recommendation_refresh_queue',
+        sa.Column('refresh_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.user_id'), nullable=True),
+        sa.Column('reason', sa.String(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('refresh_id')
+    )
+    op.create_index(
+        op.f('ix_recommendation_refresh_queue_refresh_id'),
+        'recommendation_refresh_queue',
+        ['refresh_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_recommendation_refresh_queue_refresh_id'), table_name='recommendation_refresh_queue')
+    op.drop_table('recommendation_refresh_queue')
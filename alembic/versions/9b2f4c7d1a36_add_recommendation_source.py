@@ -0,0 +1,48 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2f4c7d1a36'
+down_revision: Union[str, None] = 'e7b3d6a25c81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows are attributed to the hybrid jobs; the next matchmaking
+    # sweep writes its own rows
+    op.add_column(
+        'recommendations',
+        sa.Column('source', sa.String(), nullable=False, server_default='hybrid')
+    )
+
+    # Built concurrently, outside a transaction (see c4e8a1f7d293)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_recommendations_user_source_status_score',
+            'recommendations',
+            ['user_id', 'source', 'status', 'recommendation_score'],
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_recommendations_user_status_score', table_name='recommendations', postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_recommendations_user_status_score',
+            'recommendations',
+            ['user_id', 'status', 'recommendation_score'],
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_recommendations_user_source_status_score',
+            table_name='recommendations',
+            postgresql_concurrently=True
+        )
+    op.drop_column('recommendations', 'source')
@@ -0,0 +1,88 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1f7d293'
+down_revision: Union[str, None] = '5d7e2b9c4a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, unique), matching the Index definitions on the models
+INDEXES = [
+    ('uq_likes_liker_liked', 'likes', ['liker_user_id', 'liked_user_id'], True),
+    ('ix_likes_liked_liker', 'likes', ['liked_user_id', 'liker_user_id'], False),
+    ('uq_blocked_users_blocker_blocked', 'blocked_users', ['blocker_user_id', 'blocked_user_id'], True),
+    ('ix_blocked_users_blocked_blocker', 'blocked_users', ['blocked_user_id', 'blocker_user_id'], False),
+    ('uq_matches_user1_user2', 'matches', ['user1_id', 'user2_id'], True),
+    ('ix_matches_user2_user1', 'matches', ['user2_id', 'user1_id'], False),
+    ('ix_messages_chat_sent', 'messages', ['chat_id', 'sent_at'], False),
+    ('ix_notifications_user_created', 'notifications', ['user_id', 'created_at'], False),
+    ('ix_chats_initiator', 'chats', ['initiator_user_id'], False),
+    ('ix_chats_receiver', 'chats', ['receiver_user_id'], False),
+]
+
+
+def _smaller(table: str) -> str:
+    # Ends of a match's pair, portable to SQLite (no LEAST / GREATEST)
+    return f"CASE WHEN {table}.user1_id < {table}.user2_id THEN {table}.user1_id ELSE {table}.user2_id END"
+
+
+def _larger(table: str) -> str:
+    return f"CASE WHEN {table}.user1_id < {table}.user2_id THEN {table}.user2_id ELSE {table}.user1_id END"
+
+
+def upgrade() -> None:
+    # The unique indexes need duplicate pairs gone first; keep the oldest row of each pair
+    op.execute(
+        """
+        DELETE FROM likes WHERE like_id NOT IN (
+            SELECT MIN(like_id) FROM likes GROUP BY liker_user_id, liked_user_id
+        )
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM blocked_users WHERE block_id NOT IN (
+            SELECT MIN(block_id) FROM blocked_users GROUP BY blocker_user_id, blocked_user_id
+        )
+        """
+    )
+
+    # Matches are one per pair regardless of which user is user1: point chats at
+    # the oldest match of each pair, drop the rest, then store every pair as
+    # (smaller id, larger id) as the matchmaker does (both sides of SET read the old row)
+    op.execute(
+        f"""
+        UPDATE chats SET match_id = (
+            SELECT MIN(kept.match_id) FROM matches duplicate
+            JOIN matches kept
+                ON {_smaller('kept')} = {_smaller('duplicate')} AND {_larger('kept')} = {_larger('duplicate')}
+            WHERE duplicate.match_id = chats.match_id
+        )
+        WHERE match_id IS NOT NULL
+        """
+    )
+    op.execute(
+        f"""
+        DELETE FROM matches WHERE match_id NOT IN (
+            SELECT MIN(match_id) FROM matches GROUP BY {_smaller('matches')}, {_larger('matches')}
+        )
+        """
+    )
+    op.execute("UPDATE matches SET user1_id = user2_id, user2_id = user1_id WHERE user1_id > user2_id")
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and does not
+    # block writes to these tables while it builds. If a build fails it leaves
+    # an INVALID index behind: drop it and run the upgrade again.
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,48 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3d6a25c81'
+down_revision: Union[str, None] = 'c4e8a1f7d293'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns) serving keyset pagination by (timestamp, id)
+INDEXES = [
+    ('ix_likes_liker_created_id', 'likes', ['liker_user_id', 'created_at', 'like_id']),
+    ('ix_likes_liked_created_id', 'likes', ['liked_user_id', 'created_at', 'like_id']),
+    ('ix_matches_user1_created_id', 'matches', ['user1_id', 'created_at', 'match_id']),
+    ('ix_matches_user2_created_id', 'matches', ['user2_id', 'created_at', 'match_id']),
+    ('ix_chats_initiator_created_id', 'chats', ['initiator_user_id', 'created_at', 'chat_id']),
+    ('ix_chats_receiver_created_id', 'chats', ['receiver_user_id', 'created_at', 'chat_id']),
+    ('ix_messages_chat_sent_id', 'messages', ['chat_id', 'sent_at', 'message_id']),
+    ('ix_notifications_user_created_id', 'notifications', ['user_id', 'created_at', 'notification_id']),
+]
+
+# Prefixes of the indexes above, no longer needed once they exist
+SUPERSEDED = [
+    ('ix_chats_initiator', 'chats', ['initiator_user_id']),
+    ('ix_chats_receiver', 'chats', ['receiver_user_id']),
+    ('ix_messages_chat_sent', 'messages', ['chat_id', 'sent_at']),
+    ('ix_notifications_user_created', 'notifications', ['user_id', 'created_at']),
+]
+
+
+def upgrade() -> None:
+    # Built concurrently, outside a transaction (see c4e8a1f7d293)
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+        for name, table, _ in SUPERSEDED:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in SUPERSEDED:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
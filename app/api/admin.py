@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta, datetime
 from typing import List, Optional
 from app.models.admin import Admin
@@ -9,33 +11,51 @@ from app.models.user import User
 from app.schemas.admin import AdminCreate, AdminInDB, AdminLogin, AdminToken, AdminUpdate
 from app.schemas.user import UserInDB
 from app.schemas.security import UserReportWithUsers
-from app.database import get_db
+from app.database import async_engine, async_read_engine, engine, get_async_db, get_async_read_db, read_engine
 from utils.security import (
     get_admin_password_hash, verify_admin_password,
     create_admin_access_token, get_current_admin,
-    get_current_active_admin,
+    get_current_active_admin, invalidate_admin_auth, invalidate_user_auth,
+    user_auth_cache, admin_auth_cache,
 )
 from app.config import settings
+from utils.loaders import USER_REPORT_WITH_USERS
+from utils.pool_metrics import engine_pool_stats
+from utils.recommendation_refresh import mark_dirty
+from utils.recommendation_feed import feed_snapshots
+from utils.recommendation_cache import recommendation_cache
+from utils.visit_buffer import visit_buffer
 
 router = APIRouter()
 
 
+def reports_query(status: Optional[str] = None) -> Select:
+    """
+    User reports, optionally with one status, loaded for UserReportWithUsers
+    """
+    query = select(UserReport).options(*USER_REPORT_WITH_USERS)
+    if status:
+        query = query.where(UserReport.status == status)
+    return query
+
+
 @router.post("/register", response_model=AdminInDB)
-def register_admin(
+async def register_admin(
         admin: AdminCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     # Check if admin already exists
-    db_admin = db.query(Admin).filter(
+    result = await db.execute(select(Admin).where(
         (Admin.username == admin.username) |
         (Admin.email == admin.email)
-    ).first()
+    ))
+    db_admin = result.scalars().first()
 
     if db_admin:
         raise HTTPException(status_code=400, detail="Admin already exists")
 
     # Hash password
-    hashed_password = get_admin_password_hash(admin.password)
+    hashed_password = await run_in_threadpool(get_admin_password_hash, admin.password)
 
     # Create admin
     new_admin = Admin(
@@ -46,20 +66,20 @@ def register_admin(
     )
 
     db.add(new_admin)
-    db.commit()
-    db.refresh(new_admin)
+    await db.commit()
+    await db.refresh(new_admin)
 
     return new_admin
 
 
 @router.post("/login", response_model=AdminToken)
-def login_admin(
+async def login_admin(
         form_data: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    admin = db.query(Admin).filter(Admin.username == form_data.username).first()
+    admin = (await db.execute(select(Admin).where(Admin.username == form_data.username))).scalars().first()
 
-    if not admin or not verify_admin_password(form_data.password, admin.password_hash):
+    if not admin or not await run_in_threadpool(verify_admin_password, form_data.password, admin.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -73,42 +93,44 @@ def login_admin(
 
     # Update last login
     admin.last_login = datetime.utcnow()
-    db.commit()
+    await db.commit()
 
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=AdminInDB)
-def read_current_admin(
+async def read_current_admin(
         current_admin: Admin = Depends(get_current_active_admin),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    return current_admin
+    return await db.get(Admin, current_admin.admin_id)
 
 
 @router.put("/me", response_model=AdminInDB)
-def update_admin(
+async def update_admin(
         admin_update: AdminUpdate,
         current_admin: Admin = Depends(get_current_active_admin),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
+    current_admin = await db.get(Admin, current_admin.admin_id)
+
     if admin_update.password:
-        current_admin.password_hash = get_admin_password_hash(admin_update.password)
+        current_admin.password_hash = await run_in_threadpool(get_admin_password_hash, admin_update.password)
 
     if admin_update.email:
-        existing_admin = db.query(Admin).filter(
+        existing_admin = (await db.execute(select(Admin).where(
             Admin.email == admin_update.email,
             Admin.admin_id != current_admin.admin_id
-        ).first()
+        ))).scalars().first()
         if existing_admin:
             raise HTTPException(status_code=400, detail="Email already in use")
         current_admin.email = admin_update.email
 
     if admin_update.username:
-        existing_admin = db.query(Admin).filter(
+        existing_admin = (await db.execute(select(Admin).where(
             Admin.username == admin_update.username,
             Admin.admin_id != current_admin.admin_id
-        ).first()
+        ))).scalars().first()
         if existing_admin:
             raise HTTPException(status_code=400, detail="Username already in use")
         current_admin.username = admin_update.username
@@ -116,57 +138,53 @@ def update_admin(
     if admin_update.full_name:
         current_admin.full_name = admin_update.full_name
 
-    db.commit()
-    db.refresh(current_admin)
+    await db.commit()
+    invalidate_admin_auth(current_admin.admin_id)
+    await db.refresh(current_admin)
     return current_admin
 
 
 @router.get("/users", response_model=List[UserInDB])
-def get_all_users(
-        db: Session = Depends(get_db),
+async def get_all_users(
+        db: AsyncSession = Depends(get_async_read_db),
         current_admin: Admin = Depends(get_current_active_admin),
         skip: int = 0,
         limit: int = 100,
         search: Optional[str] = Query(None)
 ):
-    query = db.query(User)
+    query = select(User)
 
     if search:
-        query = query.filter(
+        query = query.where(
             (User.email.ilike(f"%{search}%")) |
             (User.phone_number.ilike(f"%{search}%"))
         )
 
-    users = query.offset(skip).limit(limit).all()
-    return users
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.scalars().all()
 
 
 @router.get("/reports", response_model=List[UserReportWithUsers])
-def get_all_reports(
-        db: Session = Depends(get_db),
+async def get_all_reports(
+        db: AsyncSession = Depends(get_async_read_db),
         current_admin: Admin = Depends(get_current_active_admin),
         status: Optional[str] = None,
         skip: int = 0,
         limit: int = 100
 ):
-    query = db.query(UserReport)
-
-    if status:
-        query = query.filter(UserReport.status == status)
-
-    reports = query.offset(skip).limit(limit).all()
-    return reports
+    result = await db.execute(reports_query(status).offset(skip).limit(limit))
+    return result.scalars().all()
 
 
 @router.patch("/reports/{report_id}")
-def update_report_status(
+async def update_report_status(
         report_id: int,
         status: str,
         admin_notes: Optional[str] = None,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_admin: Admin = Depends(get_current_active_admin)
 ):
-    report = db.query(UserReport).filter(UserReport.report_id == report_id).first()
+    report = await db.get(UserReport, report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
 
@@ -175,25 +193,54 @@ def update_report_status(
     if admin_notes:
         report.admin_notes = admin_notes
 
-    db.commit()
+    await db.commit()
     return {"message": "Report status updated successfully"}
 
 
 @router.patch("/users/{user_id}/status")
-def update_user_status(
+async def update_user_status(
         user_id: int,
         status: str,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         current_admin: Admin = Depends(get_current_active_admin)
 ):
     valid_statuses = ["active", "inactive", "suspended", "deleted"]
     if status not in valid_statuses:
         raise HTTPException(status_code=400, detail="Invalid status")
 
-    user = db.query(User).filter(User.user_id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     user.account_status = status
-    db.commit()
-    return {"message": f"User status updated to {status}"}
\ No newline at end of file
+    mark_dirty(db, user_id, 'status_change')
+    await db.commit()
+    invalidate_user_auth(user_id)
+    return {"message": f"User status updated to {status}"}
+
+
+@router.get("/metrics/cache")
+async def get_cache_metrics(
+        current_admin: Admin = Depends(get_current_active_admin)
+):
+    return {
+        "recommendations": recommendation_cache.stats(),
+        "recommendation_feed": feed_snapshots.stats(),
+        "visit_buffer": visit_buffer.stats(),
+        "user_auth": user_auth_cache.stats(),
+        "admin_auth": admin_auth_cache.stats(),
+    }
+
+
+@router.get("/metrics/pool")
+async def get_pool_metrics(
+        current_admin: Admin = Depends(get_current_active_admin)
+):
+    pools = {
+        "primary": engine_pool_stats(engine),
+        "primary_async": engine_pool_stats(async_engine.sync_engine),
+    }
+    if read_engine is not engine:
+        pools["replica"] = engine_pool_stats(read_engine)
+        pools["replica_async"] = engine_pool_stats(async_read_engine.sync_engine)
+    return pools
@@ -1,11 +1,13 @@
 from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserInDB, Token
 from utils.security import (
@@ -17,19 +19,21 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=UserInDB)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if email or phone already exists
-    db_user_email = db.query(User).filter(User.email == user.email).first()
+    db_user_email = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
     if db_user_email:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     if user.phone_number:
-        db_user_phone = db.query(User).filter(User.phone_number == user.phone_number).first()
+        db_user_phone = (await db.execute(
+            select(User).where(User.phone_number == user.phone_number)
+        )).scalars().first()
         if db_user_phone:
             raise HTTPException(status_code=400, detail="Phone number already registered")
 
-    # Hash password
-    hashed_password = get_password_hash(user.password)
+    # Hash password (bcrypt is CPU-bound, keep it off the event loop)
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
 
     # Create user
     db_user = User(
@@ -40,23 +44,23 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         account_status="active"
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     return db_user
 
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
         form_data: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    user = db.query(User).filter(
+    user = (await db.execute(select(User).where(
         (User.email == form_data.username) |
         (User.phone_number == form_data.username)
-    ).first()
+    ))).scalars().first()
 
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await run_in_threadpool(verify_password, form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email/phone or password",
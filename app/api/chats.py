@@ -1,41 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from app.models.interaction import Chat
 from app.schemas.interaction import ChatInDB, ChatWithUsers
-from app.database import get_db
+from app.database import get_async_read_db
 from app.schemas.user import UserInDB
+from utils.loaders import CHAT_WITH_USERS
+from utils.pagination import page_headers, page_rows, paginate
 from utils.security import get_current_user
 
 router = APIRouter()
 
 
+def user_chats_query(user_id: int) -> Select:
+    """
+    Chats the user initiated or received, loaded for ChatWithUsers
+    """
+    return select(Chat).options(*CHAT_WITH_USERS).where(
+        (Chat.initiator_user_id == user_id) |
+        (Chat.receiver_user_id == user_id)
+    )
+
+
 @router.get("/", response_model=List[ChatWithUsers])
-def get_chats(
+async def get_chats(
+        response: Response,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_read_db),
         limit: int = 10,
-        offset: int = 0
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        offset: int = Query(0, deprecated=True, description="Use the before/after cursors")
 ):
-    chats = db.query(Chat).filter(
-        (Chat.initiator_user_id == current_user.user_id) |
-        (Chat.receiver_user_id == current_user.user_id)
-    ).offset(offset).limit(limit).all()
+    try:
+        query = paginate(user_chats_query(current_user.user_id), Chat.created_at, Chat.chat_id, before, after, limit, offset)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    result = await db.execute(query)
+    chats = page_rows(result.scalars().all(), after)
+    response.headers.update(page_headers(chats, 'created_at', 'chat_id', limit))
     return chats
 
 
 @router.get("/{chat_id}", response_model=ChatWithUsers)
-def get_chat(
+async def get_chat(
         chat_id: int,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_read_db)
 ):
-    chat = db.query(Chat).filter(
-        Chat.chat_id == chat_id,
-        (Chat.initiator_user_id == current_user.user_id) |
-        (Chat.receiver_user_id == current_user.user_id)
-    ).first()
+    result = await db.execute(user_chats_query(current_user.user_id).where(Chat.chat_id == chat_id))
+    chat = result.scalars().first()
 
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
@@ -1,26 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, exists, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.models.engagement import Recommendation
 from app.models.interaction import Like
-from app.schemas.interaction import LikeCreate, LikeInDB
-from app.database import get_db
+from app.models.security import BlockedUser
+from app.models.user import User
+from app.schemas.interaction import LikeCreate, LikeInDB, SwipeBatch, SwipeBatchResult
+from app.database import get_async_db, get_db, get_read_db
+from utils.bulk import dialect_insert
+from utils.pagination import page_headers, page_rows, paginate
 from app.schemas.user import UserInDB
 from utils.security import get_current_user
-from utils.matchmaker import MatchMaker
+from utils.recommendation_refresh import mark_dirty
+from utils.recommendation_store import mark_recommendation_interacted, mark_recommendations_interacted
 
 router = APIRouter()
 
+# Likes are written by synchronous handlers (run in the threadpool): they share
+# the like graph, recommendation store and matchmaker with the offline workers.
+# Those NumPy-backed modules are imported on first use to keep startup light.
+
 
 @router.post("/", response_model=LikeInDB)
 def create_like(
         like: LikeCreate,
+        background_tasks: BackgroundTasks,
         current_user: UserInDB = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
+    from utils.like_graph import record_like
+    from utils.matchmaker import create_matches_in_background
+
     # Check if user is liking themselves
     if like.liked_user_id == current_user.user_id:
         raise HTTPException(status_code=400, detail="Cannot like yourself")
 
+    # Unknown users would otherwise surface as a foreign key violation on commit
+    if db.get(User, like.liked_user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
     # Check if like already exists
     existing_like = db.query(Like).filter(
         Like.liker_user_id == current_user.user_id,
@@ -37,37 +61,174 @@ def create_like(
         like_type=like.like_type
     )
     db.add(new_like)
-    db.commit()
+    mark_recommendation_interacted(db, current_user.user_id, like.liked_user_id)
+    mark_dirty(db, current_user.user_id, 'like')
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request stored the same like first (uq_likes_liker_liked)
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Like already exists")
     db.refresh(new_like)
+    record_like(current_user.user_id, like.liked_user_id)
 
-    # Check for mutual likes and create match if compatible
-    match_maker = MatchMaker(db)
-    match_maker.create_match_if_compatible(current_user.user_id, like.liked_user_id)
+    # Check for mutual likes and create match if compatible, after the response is sent
+    background_tasks.add_task(create_matches_in_background, current_user.user_id, [like.liked_user_id])
 
     return new_like
 
 
+@router.post("/batch", response_model=SwipeBatchResult)
+def create_likes_batch(
+        batch: SwipeBatch,
+        background_tasks: BackgroundTasks,
+        current_user: UserInDB = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """
+    Record many swipe decisions (like, super_like, pass) in one request.
+    The last decision per user wins; likes that already exist and decisions
+    about unknown users are reported and skipped.
+    """
+    from utils.like_graph import record_like
+    from utils.matchmaker import create_matches_in_background
+
+    if len(batch.decisions) > settings.SWIPE_BATCH_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {settings.SWIPE_BATCH_MAX_SIZE} decisions per batch")
+
+    actions = {}
+    for decision in batch.decisions:
+        if decision.action not in ("like", "super_like", "pass"):
+            raise HTTPException(status_code=400, detail=f"Invalid action: {decision.action}")
+        if decision.user_id == current_user.user_id:
+            raise HTTPException(status_code=400, detail="Cannot like yourself")
+        actions[decision.user_id] = decision.action
+
+    # One set-based lookup of the targets (do they exist, are they liked already),
+    # then one multi-row insert
+    targets = db.query(User.user_id, Like.like_id).outerjoin(Like, and_(
+        Like.liker_user_id == current_user.user_id,
+        Like.liked_user_id == User.user_id
+    )).filter(User.user_id.in_(list(actions))).all() if actions else []
+    known = {user_id for user_id, _ in targets}
+    already_liked = {user_id for user_id, like_id in targets if like_id is not None}
+    unknown = [user_id for user_id in actions if user_id not in known]
+    actions = {user_id: action for user_id, action in actions.items() if user_id in known}
+
+    passed = [user_id for user_id, action in actions.items() if action == "pass"]
+    to_like = {user_id: action for user_id, action in actions.items() if action != "pass"}
+
+    liked = []
+    if to_like:
+        rows = [
+            {"liker_user_id": current_user.user_id, "liked_user_id": user_id, "like_type": action}
+            for user_id, action in to_like.items() if user_id not in already_liked
+        ]
+        if rows:
+            inserted = db.execute(
+                dialect_insert(db, Like).values(rows).on_conflict_do_nothing().returning(Like.liked_user_id)
+            )
+            liked = [row[0] for row in inserted]
+
+    # Mutual likes for the whole batch in one query
+    liked_back = []
+    if liked:
+        liked_back = [row[0] for row in db.query(Like.liker_user_id).filter(
+            Like.liker_user_id.in_(liked),
+            Like.liked_user_id == current_user.user_id
+        ).distinct().all()]
+
+    mark_recommendations_interacted(db, current_user.user_id, list(actions))
+    if liked:
+        mark_dirty(db, current_user.user_id, 'like')
+    db.commit()
+    for user_id in liked:
+        record_like(current_user.user_id, user_id)
+
+    # Check new likes for compatible matches after the response is sent
+    if liked:
+        background_tasks.add_task(create_matches_in_background, current_user.user_id, liked)
+
+    return SwipeBatchResult(
+        liked=liked,
+        already_liked=[user_id for user_id in to_like if user_id in already_liked],
+        passed=passed,
+        liked_back=liked_back,
+        unknown=unknown
+    )
+
+
 @router.get("/received", response_model=list[LikeInDB])
-def get_received_likes(
+async def get_received_likes(
+        response: Response,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         limit: int = 10,
-        offset: int = 0
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        offset: int = Query(0, deprecated=True, description="Use the before/after cursors")
 ):
-    likes = db.query(Like).filter(
-        Like.liked_user_id == current_user.user_id
-    ).offset(offset).limit(limit).all()
-    return likes
+    return await like_page(db, response, Like.liked_user_id == current_user.user_id, before, after, limit, offset)
 
 
 @router.get("/sent", response_model=list[LikeInDB])
-def get_sent_likes(
+async def get_sent_likes(
+        response: Response,
+        current_user: UserInDB = Depends(get_current_user),
+        db: AsyncSession = Depends(get_async_db),
+        limit: int = 10,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        offset: int = Query(0, deprecated=True, description="Use the before/after cursors")
+):
+    return await like_page(db, response, Like.liker_user_id == current_user.user_id, before, after, limit, offset)
+
+
+async def like_page(db: AsyncSession, response: Response, criterion, before: Optional[str], after: Optional[str],
+                    limit: int, offset: int):
+    """
+    Newest-first page of the likes matching `criterion`, with cursor headers
+    """
+    try:
+        query = paginate(select(Like).where(criterion), Like.created_at, Like.like_id, before, after, limit, offset)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    result = await db.execute(query)
+    likes = page_rows(result.scalars().all(), after)
+    response.headers.update(page_headers(likes, 'created_at', 'like_id', limit))
+    return likes
+
+
+@router.get("/pending", response_model=list[LikeInDB])
+def get_pending_likes(
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         limit: int = 10,
         offset: int = 0
 ):
-    likes = db.query(Like).filter(
-        Like.liker_user_id == current_user.user_id
-    ).offset(offset).limit(limit).all()
-    return likes
\ No newline at end of file
+    """
+    Likes received from active users the current user has not liked back,
+    passed on or blocked, newest first
+    """
+    from utils.like_graph import get_like_graph
+
+    pending = get_like_graph(db).pending_likes(current_user.user_id).tolist()
+    if not pending:
+        return []
+
+    likes = db.query(Like).join(User, User.user_id == Like.liker_user_id).filter(
+        Like.liked_user_id == current_user.user_id,
+        Like.liker_user_id.in_(pending),
+        User.account_status == 'active',
+        ~exists().where(
+            Recommendation.user_id == current_user.user_id,
+            Recommendation.recommended_user_id == Like.liker_user_id,
+            Recommendation.status == 'interacted'
+        ),
+        ~exists().where(or_(
+            and_(BlockedUser.blocker_user_id == current_user.user_id, BlockedUser.blocked_user_id == Like.liker_user_id),
+            and_(BlockedUser.blocker_user_id == Like.liker_user_id, BlockedUser.blocked_user_id == current_user.user_id)
+        ))
+    ).order_by(Like.created_at.desc(), Like.like_id.desc()).offset(offset).limit(limit).all()
+    return likes
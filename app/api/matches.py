@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from app.models.interaction import Match
 from app.schemas.interaction import MatchInDB, MatchWithUsers
-from app.database import get_db
+from app.database import get_async_db, get_async_read_db
 from app.schemas.user import UserInDB
+from utils.loaders import MATCH_WITH_USERS
+from utils.pagination import page_headers, page_rows, paginate
 from utils.security import get_current_user
 from app.models.profile import Profile
 from app.schemas.profile import ProfileSummary
@@ -13,56 +16,75 @@ from app.schemas.profile import ProfileSummary
 router = APIRouter()
 
 
+def user_matches_query(user_id: int) -> Select:
+    """
+    Active matches of the user, loaded for MatchWithUsers
+    """
+    return select(Match).options(*MATCH_WITH_USERS).where(
+        (Match.user1_id == user_id) |
+        (Match.user2_id == user_id),
+        Match.match_status == 'active'
+    )
+
+
 @router.get("/", response_model=List[MatchWithUsers])
-def get_matches(
+async def get_matches(
+        response: Response,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_read_db),
         limit: int = 10,
-        offset: int = 0
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        offset: int = Query(0, deprecated=True, description="Use the before/after cursors")
 ):
-    matches = db.query(Match).filter(
-        (Match.user1_id == current_user.user_id) |
-        (Match.user2_id == current_user.user_id),
-        Match.match_status == 'active'
-    ).offset(offset).limit(limit).all()
+    try:
+        query = paginate(user_matches_query(current_user.user_id), Match.created_at, Match.match_id, before, after, limit, offset)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    result = await db.execute(query)
+    matches = page_rows(result.scalars().all(), after)
+    response.headers.update(page_headers(matches, 'created_at', 'match_id', limit))
     return matches
 
 
 @router.delete("/{match_id}")
-def unmatch(
+async def unmatch(
         match_id: int,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    match = db.query(Match).filter(
+    result = await db.execute(select(Match).where(
         Match.match_id == match_id,
         (Match.user1_id == current_user.user_id) |
         (Match.user2_id == current_user.user_id)
-    ).first()
+    ))
+    match = result.scalars().first()
 
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
 
     match.match_status = 'unmatched'
-    db.commit()
+    await db.commit()
 
     return {"message": "Successfully unmatched"}
 
 
 @router.get("/matched-profiles", response_model=List[ProfileSummary])
-def get_matched_profiles(
+async def get_matched_profiles(
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_read_db),
         limit: int = 10,
         offset: int = 0
 ):
     """
     Get profiles of users matched with the current user.
     """
-    matches = db.query(Match).filter(
+    result = await db.execute(select(Match).where(
         ((Match.user1_id == current_user.user_id) | (Match.user2_id == current_user.user_id)),
         Match.match_status == 'active'
-    ).offset(offset).limit(limit).all()
+    ).offset(offset).limit(limit))
+    matches = result.scalars().all()
 
     matched_user_ids = []
     for match in matches:
@@ -71,5 +93,5 @@ def get_matched_profiles(
         else:
             matched_user_ids.append(match.user1_id)
 
-    profiles = db.query(Profile).filter(Profile.user_id.in_(matched_user_ids)).all()
-    return profiles
+    result = await db.execute(select(Profile).where(Profile.user_id.in_(matched_user_ids)))
+    return result.scalars().all()
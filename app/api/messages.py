@@ -1,40 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from app.models.interaction import Chat, Message
 from app.models.security import BlockedUser
 from app.schemas.interaction import MessageCreate, MessageInDB, MessageWithUsers
-from app.database import get_db
+from app.database import get_async_db
 from app.schemas.user import UserInDB
+from utils.loaders import MESSAGE_WITH_USERS
+from utils.pagination import page_headers, page_rows, paginate
 from utils.security import get_current_user
 
 router = APIRouter()
 
 
+def chat_messages_query(chat_id: int) -> Select:
+    """
+    Messages of a chat, loaded for MessageWithUsers
+    """
+    return select(Message).options(*MESSAGE_WITH_USERS).where(Message.chat_id == chat_id)
+
+
+async def get_user_chat(db: AsyncSession, chat_id: int, user_id: int):
+    result = await db.execute(select(Chat).where(
+        Chat.chat_id == chat_id,
+        (Chat.initiator_user_id == user_id) |
+        (Chat.receiver_user_id == user_id)
+    ))
+    return result.scalars().first()
+
+
+async def count_messages(db: AsyncSession, chat_id: int, sender_user_id: int) -> int:
+    return await db.scalar(select(func.count()).select_from(Message).where(
+        Message.chat_id == chat_id,
+        Message.sender_user_id == sender_user_id
+    ))
+
+
 @router.post("/", response_model=MessageInDB)
-def create_message(
+async def create_message(
         message: MessageCreate,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     # Check if chat exists and user is part of it
-    chat = db.query(Chat).filter(
-        Chat.chat_id == message.chat_id,
-        (Chat.initiator_user_id == current_user.user_id) |
-        (Chat.receiver_user_id == current_user.user_id)
-    ).first()
+    chat = await get_user_chat(db, message.chat_id, current_user.user_id)
 
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
 
     # Check if receiver is blocked
-    blocked = db.query(BlockedUser).filter(
+    blocked = (await db.execute(select(BlockedUser).where(
         ((BlockedUser.blocker_user_id == current_user.user_id) &
          (BlockedUser.blocked_user_id == message.receiver_user_id)) |
         ((BlockedUser.blocker_user_id == message.receiver_user_id) &
          (BlockedUser.blocked_user_id == current_user.user_id))
-    ).first()
+    ))).scalars().first()
 
     if blocked:
         raise HTTPException(status_code=403, detail="Cannot message blocked user")
@@ -42,25 +64,19 @@ def create_message(
     # Only allow 1-2 messages if chat.state == 'request' and recipient hasn't replied
     if chat.state == 'request':
         # Count messages sent by current user in this chat
-        sent_count = db.query(Message).filter(
-            Message.chat_id == chat.chat_id,
-            Message.sender_user_id == current_user.user_id
-        ).count()
+        sent_count = await count_messages(db, chat.chat_id, current_user.user_id)
         # Check if recipient has replied
-        recipient_replied = db.query(Message).filter(
-            Message.chat_id == chat.chat_id,
-            Message.sender_user_id == message.receiver_user_id
-        ).count() > 0
+        recipient_replied = await count_messages(db, chat.chat_id, message.receiver_user_id) > 0
         if not recipient_replied and sent_count >= 2:
             raise HTTPException(status_code=403, detail="You can only send 2 messages until the recipient replies or you are matched.")
         # If recipient replied, unlock chat
         if recipient_replied:
             chat.state = 'active'
-            db.commit()
+            await db.commit()
     # If chat is linked to a match, unlock chat
     if chat.match_id is not None and chat.state != 'active':
         chat.state = 'active'
-        db.commit()
+        await db.commit()
 
     # Create message
     new_message = Message(
@@ -71,31 +87,39 @@ def create_message(
         message_type=message.message_type
     )
     db.add(new_message)
-    db.commit()
-    db.refresh(new_message)
+    await db.commit()
+    await db.refresh(new_message)
 
     return new_message
 
 
 @router.get("/chat/{chat_id}", response_model=List[MessageWithUsers])
-def get_chat_messages(
+async def get_chat_messages(
         chat_id: int,
+        response: Response,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
         limit: int = 100,
-        offset: int = 0
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        offset: int = Query(0, deprecated=True, description="Use the before/after cursors")
 ):
+    """
+    Messages of a chat, newest first. Page back with the X-Next-Cursor
+    header as `before`; fetch newer messages with X-Prev-Cursor as `after`.
+    """
     # Check if chat exists and user is part of it
-    chat = db.query(Chat).filter(
-        Chat.chat_id == chat_id,
-        (Chat.initiator_user_id == current_user.user_id) |
-        (Chat.receiver_user_id == current_user.user_id)
-    ).first()
+    chat = await get_user_chat(db, chat_id, current_user.user_id)
 
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    messages = db.query(Message).filter(
-        Message.chat_id == chat_id
-    ).order_by(Message.sent_at.desc()).offset(offset).limit(limit).all()
+    try:
+        query = paginate(chat_messages_query(chat_id), Message.sent_at, Message.message_id, before, after, limit, offset)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    result = await db.execute(query)
+    messages = page_rows(result.scalars().all(), after)
+    response.headers.update(page_headers(messages, 'sent_at', 'message_id', limit))
     return messages
\ No newline at end of file
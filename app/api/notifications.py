@@ -1,44 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from app.models.engagement import Notification
 from app.schemas.engagement import NotificationInDB, NotificationWithUser
-from app.database import get_db
+from app.database import get_async_db, get_async_read_db
 from app.schemas.user import UserInDB
+from utils.loaders import NOTIFICATION_WITH_USER
+from utils.pagination import page_headers, page_rows, paginate
 from utils.security import get_current_user
 
 router = APIRouter()
 
 
+def user_notifications_query(user_id: int) -> Select:
+    """
+    Notifications of the user, loaded for NotificationWithUser
+    """
+    return select(Notification).options(*NOTIFICATION_WITH_USER).where(Notification.user_id == user_id)
+
+
 @router.get("/", response_model=List[NotificationWithUser])
-def get_notifications(
+async def get_notifications(
+        response: Response,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_read_db),
         limit: int = 10,
-        offset: int = 0
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        offset: int = Query(0, deprecated=True, description="Use the before/after cursors")
 ):
-    notifications = db.query(Notification).filter(
-        Notification.user_id == current_user.user_id
-    ).order_by(Notification.created_at.desc()).offset(offset).limit(limit).all()
+    try:
+        query = paginate(user_notifications_query(current_user.user_id), Notification.created_at, Notification.notification_id, before, after, limit, offset)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    result = await db.execute(query)
+    notifications = page_rows(result.scalars().all(), after)
+    response.headers.update(page_headers(notifications, 'created_at', 'notification_id', limit))
     return notifications
 
 
 @router.patch("/{notification_id}/read")
-def mark_notification_as_read(
+async def mark_notification_as_read(
         notification_id: int,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    notification = db.query(Notification).filter(
+    result = await db.execute(select(Notification).where(
         Notification.notification_id == notification_id,
         Notification.user_id == current_user.user_id
-    ).first()
+    ))
+    notification = result.scalars().first()
 
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
 
     notification.is_read = True
-    db.commit()
+    await db.commit()
 
     return {"message": "Notification marked as read"}
\ No newline at end of file
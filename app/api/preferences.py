@@ -1,59 +1,68 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.preference import Preference
 from app.schemas.preference import PreferenceCreate, PreferenceUpdate, PreferenceInDB
-from app.database import get_db
+from app.database import get_async_db
 from app.schemas.user import UserInDB
+from utils.recommendation_refresh import mark_dirty
 from utils.security import get_current_user
 
 router = APIRouter()
 
 
+async def get_user_preference(db: AsyncSession, user_id: int):
+    result = await db.execute(select(Preference).where(Preference.user_id == user_id))
+    return result.scalars().first()
+
+
 @router.post("/", response_model=PreferenceInDB)
-def create_preference(
+async def create_preference(
         preference: PreferenceCreate,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     # Check if preference already exists
-    db_pref = db.query(Preference).filter(Preference.user_id == current_user.user_id).first()
+    db_pref = await get_user_preference(db, current_user.user_id)
     if db_pref:
         raise HTTPException(status_code=400, detail="Preference already exists")
 
     # Create preference
     new_pref = Preference(**preference.dict(), user_id=current_user.user_id)
     db.add(new_pref)
-    db.commit()
-    db.refresh(new_pref)
+    mark_dirty(db, current_user.user_id, 'preference_create')
+    await db.commit()
+    await db.refresh(new_pref)
 
     return new_pref
 
 
 @router.get("/me", response_model=PreferenceInDB)
-def read_current_preference(
+async def read_current_preference(
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    db_pref = db.query(Preference).filter(Preference.user_id == current_user.user_id).first()
+    db_pref = await get_user_preference(db, current_user.user_id)
     if not db_pref:
         raise HTTPException(status_code=404, detail="Preference not found")
     return db_pref
 
 
 @router.put("/me", response_model=PreferenceInDB)
-def update_preference(
+async def update_preference(
         preference: PreferenceUpdate,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    db_pref = db.query(Preference).filter(Preference.user_id == current_user.user_id).first()
+    db_pref = await get_user_preference(db, current_user.user_id)
     if not db_pref:
         raise HTTPException(status_code=404, detail="Preference not found")
 
     for key, value in preference.dict(exclude_unset=True).items():
         setattr(db_pref, key, value)
 
-    db.commit()
-    db.refresh(db_pref)
+    mark_dirty(db, current_user.user_id, 'preference_update')
+    await db.commit()
+    await db.refresh(db_pref)
     return db_pref
\ No newline at end of file
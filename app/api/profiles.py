@@ -1,97 +1,115 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
+from app.config import settings
 from app.models.user import User
-from utils.recommender import Recommender
-from app.models.interaction import ProfileVisit
+from utils.recommendation_feed import create_snapshot, get_snapshot, parse_feed_cursor, snapshot_page
+from utils.recommendation_refresh import mark_dirty
+from utils.recommendation_store import fetch_stored_recommendations
 from app.models.profile import Profile
 from app.models.security import BlockedUser
-from app.schemas.profile import ProfileCreate, ProfileUpdate, ProfileInDB, ProfileSummary
-from app.database import get_db
+from app.schemas.profile import (
+    ProfileCreate, ProfileUpdate, ProfileInDB, ProfileSummary, ProfileVisitorSummary, RecommendationFeedPage
+)
+from app.database import get_async_db, get_async_read_db, get_db, get_read_db
 from app.schemas.user import UserInDB
 from utils.security import get_current_user
+from utils.visit_buffer import visit_buffer
+from utils.visit_rollup import recent_visitors
 
 router = APIRouter()
 
+# Recommendation endpoints stay synchronous (run in the threadpool): ranking is
+# CPU-bound NumPy work on the sync session the engines share with the workers.
+# The recommender is imported on first use to keep NumPy out of startup.
+
+
+async def get_user_profile(db: AsyncSession, user_id: int):
+    result = await db.execute(select(Profile).where(Profile.user_id == user_id))
+    return result.scalars().first()
+
 
 @router.post("/", response_model=ProfileInDB)
-def create_profile(
+async def create_profile(
         profile: ProfileCreate,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     # Check if profile already exists
-    db_profile = db.query(Profile).filter(Profile.user_id == current_user.user_id).first()
+    db_profile = await get_user_profile(db, current_user.user_id)
     if db_profile:
         raise HTTPException(status_code=400, detail="Profile already exists")
 
     # Create profile
     new_profile = Profile(**profile.dict(), user_id=current_user.user_id)
     db.add(new_profile)
-    db.commit()
-    db.refresh(new_profile)
+    mark_dirty(db, current_user.user_id, 'profile_create')
+    await db.commit()
+    await db.refresh(new_profile)
 
     return new_profile
 
 
 @router.get("/me", response_model=ProfileInDB)
-def read_current_profile(
+async def read_current_profile(
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    db_profile = db.query(Profile).filter(Profile.user_id == current_user.user_id).first()
+    db_profile = await get_user_profile(db, current_user.user_id)
     if not db_profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     return db_profile
 
 
 @router.put("/me", response_model=ProfileInDB)
-def update_profile(
+async def update_profile(
         profile: ProfileUpdate,
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    db_profile = db.query(Profile).filter(Profile.user_id == current_user.user_id).first()
+    db_profile = await get_user_profile(db, current_user.user_id)
     if not db_profile:
         raise HTTPException(status_code=404, detail="Profile not found")
 
     for key, value in profile.dict(exclude_unset=True).items():
         setattr(db_profile, key, value)
 
-    db.commit()
-    db.refresh(db_profile)
+    mark_dirty(db, current_user.user_id, 'profile_update')
+    await db.commit()
+    await db.refresh(db_profile)
     return db_profile
 
 
-@router.get("/{user_id}", response_model=ProfileSummary)
-def read_profile(
-        user_id: int,
+@router.get("/me/visitors", response_model=List[ProfileVisitorSummary])
+def read_profile_visitors(
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db),
+        days: int = 30,
+        limit: int = 20,
+        offset: int = 0
 ):
-    # Check if user is blocked
-    blocked = db.query(BlockedUser).filter(
-        ((BlockedUser.blocker_user_id == current_user.user_id) & (BlockedUser.blocked_user_id == user_id)) |
-        ((BlockedUser.blocker_user_id == user_id) & (BlockedUser.blocked_user_id == current_user.user_id))
-    ).first()
-
-    if blocked:
-        raise HTTPException(status_code=403, detail="You are blocked from viewing this profile")
-
-    db_profile = db.query(Profile).filter(Profile.user_id == user_id).first()
-    if not db_profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-
-    # Record profile visit
-    visit = ProfileVisit(
-        visitor_user_id=current_user.user_id,
-        visited_profile_user_id=user_id
-    )
-    db.add(visit)
-    db.commit()
+    """
+    Who viewed my profile over the last `days` days, most recent first.
+    Served from the daily visit rollup; visits still buffered in memory
+    appear after the next flush.
+    """
+    if days < 1 or limit < 1:
+        raise HTTPException(status_code=400, detail="days and limit must be positive")
 
-    return db_profile
+    visitors = recent_visitors(db, current_user.user_id, days, limit, offset)
+    profiles = {profile.user_id: profile for profile in profiles_in_order(db, [v.visitor_user_id for v in visitors])}
+    return [
+        ProfileVisitorSummary(
+            visitor=profiles[v.visitor_user_id],
+            visit_count=v.visit_count,
+            last_visit_at=v.last_visit_at
+        )
+        for v in visitors
+        if v.visitor_user_id in profiles
+    ]
 
 
 # NEW RECOMMENDATION ENDPOINT
@@ -104,28 +122,102 @@ def get_recommended_profiles(
     """
     Get recommended profiles for the current user based on AI matching
     """
-    # Initialize recommender
-    recommender = Recommender(db)
+    from utils.recommender import Recommender
 
-    # Get recommendations
-    recommendations = recommender.hybrid_recommendation(
-        user_id=current_user.user_id,
-        limit=limit
-    )
+    recommended_user_ids = []
+
+    # Serve precomputed recommendations when enabled
+    if settings.RECOMMENDATION_SOURCE == "precomputed":
+        recommended_user_ids = fetch_stored_recommendations(db, current_user.user_id, limit)
+
+    # Fall back to computing them (always in live mode, or if none are stored yet);
+    # lists are cached per user until they expire or the user's inputs change
+    if not recommended_user_ids:
+        recommender = Recommender(db)
+        recommended_user_ids = recommender.recommended_user_ids(current_user.user_id, limit)
+
+    return profiles_in_order(db, recommended_user_ids)
+
+
+@router.get("/recommendations/feed", response_model=RecommendationFeedPage)
+def get_recommendation_feed(
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+        cursor: Optional[str] = None,
+        limit: int = 10
+):
+    """
+    Page through recommended profiles. The first request ranks up to
+    RECOMMENDATION_FEED_SIZE profiles once and stores them as a snapshot;
+    pass `next_cursor` back to read the following pages from it.
+    """
+    from utils.recommender import Recommender
 
-    # Extract recommended user IDs
-    recommended_user_ids = [rec.recommended_user_id for rec in recommendations]
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+
+    if cursor:
+        try:
+            snapshot_id, offset = parse_feed_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        ranked_user_ids = get_snapshot(current_user.user_id, snapshot_id)
+        if ranked_user_ids is None:
+            raise HTTPException(status_code=410, detail="Cursor expired, restart the feed")
+    else:
+        ranked_user_ids = []
+        if settings.RECOMMENDATION_SOURCE == "precomputed":
+            ranked_user_ids = fetch_stored_recommendations(
+                db, current_user.user_id, settings.RECOMMENDATION_FEED_SIZE
+            )
+        if not ranked_user_ids:
+            ranked_user_ids = Recommender(db).recommended_user_ids(
+                current_user.user_id, settings.RECOMMENDATION_FEED_SIZE
+            )
+        snapshot_id, offset = create_snapshot(current_user.user_id, ranked_user_ids), 0
+
+    page, next_cursor = snapshot_page(snapshot_id, ranked_user_ids, offset, limit)
+    return RecommendationFeedPage(items=profiles_in_order(db, page), next_cursor=next_cursor)
+
+
+def profiles_in_order(db: Session, user_ids: List[int]) -> List[Profile]:
+    """
+    Profiles of `user_ids` in the given order, skipping users without one
+    """
+    profiles = db.query(Profile).filter(Profile.user_id.in_(user_ids)).all()
+    profiles_by_user = {profile.user_id: profile for profile in profiles}
+    return [profiles_by_user[uid] for uid in user_ids if uid in profiles_by_user]
+
+
+@router.get("/{user_id}", response_model=ProfileSummary)
+async def read_profile(
+        user_id: int,
+        current_user: UserInDB = Depends(get_current_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    # Check if user is blocked
+    blocked = (await db.execute(select(BlockedUser).where(
+        ((BlockedUser.blocker_user_id == current_user.user_id) & (BlockedUser.blocked_user_id == user_id)) |
+        ((BlockedUser.blocker_user_id == user_id) & (BlockedUser.blocked_user_id == current_user.user_id))
+    ))).scalars().first()
+
+    if blocked:
+        raise HTTPException(status_code=403, detail="You are blocked from viewing this profile")
+
+    db_profile = await get_user_profile(db, user_id)
+    if not db_profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    # Record profile visit (written in bulk by the visit buffer)
+    visit_buffer.record(current_user.user_id, user_id)
+
+    return db_profile
 
-    # Fetch profiles for recommended users
-    profiles = db.query(Profile).filter(
-        Profile.user_id.in_(recommended_user_ids)
-    ).all()
 
-    return profiles
 @router.get("/", response_model=List[ProfileSummary])
-def search_profiles(
+async def search_profiles(
         current_user: UserInDB = Depends(get_current_user),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_read_db),
         age_min: int = None,
         age_max: int = None,
         religion: str = None,
@@ -134,7 +226,7 @@ def search_profiles(
         limit: int = 10,
         offset: int = 0
 ):
-    query = db.query(Profile).filter(
+    query = select(Profile).where(
         Profile.user_id != current_user.user_id,
         Profile.profile_visibility == 'public'
     )
@@ -145,23 +237,23 @@ def search_profiles(
         pass  # Implementation would require SQL functions or post-filtering
 
     if religion:
-        query = query.filter(Profile.religion_text == religion)
+        query = query.where(Profile.religion_text == religion)
 
     if caste:
-        query = query.filter(Profile.caste_text == caste)
+        query = query.where(Profile.caste_text == caste)
 
     if location:
-        query = query.filter(
+        query = query.where(
             (Profile.city_text == location) |
             (Profile.district_text == location)
         )
 
     # Exclude blocked users
-    blocked_users = db.query(BlockedUser.blocked_user_id).filter(
+    blocked_users = (await db.execute(select(BlockedUser.blocked_user_id).where(
         BlockedUser.blocker_user_id == current_user.user_id
-    ).all()
+    ))).all()
     blocked_user_ids = [bu[0] for bu in blocked_users]
-    query = query.filter(Profile.user_id.notin_(blocked_user_ids))
+    query = query.where(Profile.user_id.notin_(blocked_user_ids))
 
-    profiles = query.offset(offset).limit(limit).all()
-    return profiles
\ No newline at end of file
+    result = await db.execute(query.offset(offset).limit(limit))
+    return result.scalars().all()
\ No newline at end of file
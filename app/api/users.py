@@ -1,31 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.models.user import User
 from app.schemas.user import UserInDB
-from app.database import get_db
+from app.database import get_async_db
 from utils.security import get_current_user
 
 router = APIRouter()
 
 @router.get("/me", response_model=UserInDB)
-def read_current_user(
+async def read_current_user(
     current_user: UserInDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_user = db.query(User).filter(User.user_id == current_user.user_id).first()
+    db_user = await db.get(User, current_user.user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 @router.get("/{user_id}", response_model=UserInDB)
-def read_user(
+async def read_user(
     user_id: int,
     current_user: UserInDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_user = db.query(User).filter(User.user_id == user_id).first()
+    db_user = await db.get(User, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
\ No newline at end of file
@@ -1,8 +1,24 @@
 from pydantic_settings import BaseSettings
 from pydantic import PostgresDsn, EmailStr, AnyUrl
+from typing import Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Optional read replica for heavy listing endpoints (defaults to DATABASE_URL)
+    DATABASE_READ_URL: Optional[str] = None
+
+    # Connection pool of each PostgreSQL engine (per process; sync and async
+    # engines have one each). 0 disables the statement timeout.
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    DATABASE_POOL_TIMEOUT_SECONDS: float = 30.0
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_STATEMENT_TIMEOUT_MS: int = 0
+
+    # Create missing tables when the app starts (development only; Alembic
+    # manages the schema everywhere else)
+    DATABASE_CREATE_ALL_ON_STARTUP: bool = False
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
@@ -18,6 +34,53 @@ class Settings(BaseSettings):
     ADMIN_SECRET_KEY: str
     ADMIN_ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     ADMIN_ALLOWED_ORIGINS: list[str] = ["http://admin.localhost"]
+
+    # 'live' computes recommendations per request, 'precomputed' serves the
+    # recommendations table filled by utils.precompute_recommendations
+    RECOMMENDATION_SOURCE: str = "live"
+
+    # Approximate nearest-neighbour candidate retrieval for content-based
+    # recommendations, used once the index holds at least ANN_MIN_POPULATION users
+    ANN_MIN_POPULATION: int = 50000
+    ANN_CANDIDATES: int = 3000
+    ANN_NPROBE: int = 8
+    ANN_INDEX_TTL_SECONDS: int = 3600
+
+    # Mutual-eligibility bitmap index used to pre-select matchmaking candidates
+    # once it holds at least ELIGIBILITY_MIN_POPULATION users
+    ELIGIBILITY_MIN_POPULATION: int = 20000
+    ELIGIBILITY_INDEX_TTL_SECONDS: int = 900
+
+    # Per-process LRU cache of live hybrid recommendation lists (0 disables it)
+    RECOMMENDATION_CACHE_SIZE: int = 10000
+    RECOMMENDATION_CACHE_TTL_SECONDS: int = 300
+
+    # Cursor-paginated recommendation feed: ranked ids kept per snapshot
+    RECOMMENDATION_FEED_SIZE: int = 200
+    RECOMMENDATION_FEED_SNAPSHOTS: int = 20000
+    RECOMMENDATION_FEED_TTL_SECONDS: int = 1800
+
+    # Most swipe decisions accepted by POST /api/likes/batch
+    SWIPE_BATCH_MAX_SIZE: int = 200
+
+    # Load the in-memory like graph when the app starts instead of on first use
+    LIKE_GRAPH_WARM_ON_STARTUP: bool = False
+
+    # Profile visits are buffered in memory and bulk-inserted by a background
+    # thread; repeat views within VISIT_DEDUP_SECONDS are recorded once (0 disables)
+    VISIT_BUFFER_CAPACITY: int = 10000
+    VISIT_FLUSH_SIZE: int = 500
+    VISIT_FLUSH_INTERVAL_SECONDS: float = 5.0
+    VISIT_DEDUP_SECONDS: float = 0.0
+
+    # Authorization fields of authenticated users and admins are cached per
+    # process; status changes made by admins invalidate them immediately
+    AUTH_CACHE_SIZE: int = 50000
+    AUTH_CACHE_TTL_SECONDS: int = 30
+
+    # Raw profile visits older than this are purged (utils.visit_rollup);
+    # the daily rollup behind /api/profiles/me/visitors is kept
+    VISIT_RETENTION_DAYS: int = 90
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,14 +1,89 @@
+from typing import Any, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
+from utils.pool_metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool
 
 SQLALCHEMY_DATABASE_URL = str(settings.DATABASE_URL)
+# Heavy read-only endpoints go to the replica when one is configured
+SQLALCHEMY_READ_DATABASE_URL = str(settings.DATABASE_READ_URL or settings.DATABASE_URL)
+
+
+def async_database_url(url: str) -> URL:
+    """
+    DATABASE_URL with its async driver: asyncpg for PostgreSQL, aiosqlite for
+    SQLite. asyncpg takes `ssl` where libpq takes `sslmode`.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == 'postgresql':
+        query = dict(url.query)
+        if 'sslmode' in query:
+            query['ssl'] = query.pop('sslmode')
+        return url.set(drivername='postgresql+asyncpg', query=query)
+    if url.get_backend_name() == 'sqlite':
+        return url.set(drivername='sqlite+aiosqlite')
+    return url
+
+
+def engine_options(url: URL) -> Dict[str, Any]:
+    """
+    Pool sizing and statement timeout from Settings, for a sync (psycopg2) or
+    async (asyncpg) PostgreSQL URL. SQLite keeps SQLAlchemy's default pool.
+    """
+    if url.get_backend_name() != 'postgresql':
+        return {}
+
+    options = {
+        'poolclass': TimedAsyncAdaptedQueuePool if url.get_driver_name() == 'asyncpg' else TimedQueuePool,
+        'pool_size': settings.DATABASE_POOL_SIZE,
+        'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+        'pool_timeout': settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        'pool_recycle': settings.DATABASE_POOL_RECYCLE_SECONDS,
+        'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+    }
+    if settings.DATABASE_STATEMENT_TIMEOUT_MS > 0:
+        timeout = str(settings.DATABASE_STATEMENT_TIMEOUT_MS)
+        if url.get_driver_name() == 'asyncpg':
+            options['connect_args'] = {'server_settings': {'statement_timeout': timeout}}
+        else:
+            options['connect_args'] = {'options': f'-c statement_timeout={timeout}'}
+    return options
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+def make_engine(url: str):
+    url = make_url(url)
+    return create_engine(url, **engine_options(url))
+
+
+def make_async_engine(url: str):
+    url = async_database_url(url)
+    return create_async_engine(url, **engine_options(url))
+
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Used by the async route handlers and security dependencies. Objects stay
+# loaded after commit, since an expired attribute cannot be lazy-loaded
+# outside an await.
+async_engine = make_async_engine(SQLALCHEMY_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+if settings.DATABASE_READ_URL:
+    read_engine = make_engine(SQLALCHEMY_READ_DATABASE_URL)
+    async_read_engine = make_async_engine(SQLALCHEMY_READ_DATABASE_URL)
+else:
+    read_engine, async_read_engine = engine, async_engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -16,4 +91,26 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db():
+    """
+    Session on the read replica (the primary if none is configured); may lag
+    behind the primary, so only for listings that tolerate it
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -1,5 +1,9 @@
+import logging
+import time
 from datetime import datetime
 
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -9,8 +13,12 @@ from app.api import (
     notifications, admin
 )
 from app.config import settings
-from app.database import engine
+from app.database import SessionLocal, engine
 from app.models.base import Base
+from utils.pagination import NEXT_CURSOR_HEADER, PREVIOUS_CURSOR_HEADER
+from utils.visit_buffer import visit_buffer
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Sambandha API",
@@ -27,11 +35,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PREVIOUS_CURSOR_HEADER],
 )
 
-# Create database tables (for development)
-Base.metadata.create_all(bind=engine)
-
 # Include API routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
@@ -44,6 +50,45 @@ app.include_router(messages.router, prefix="/api/messages", tags=["Messaging"])
 app.include_router(notifications.router, prefix="/api/notifications", tags=["Notifications"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
+# Time from the first import of this module until the app is assembled;
+# `python -m app.manage import-report` breaks it down per module
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+
+@app.on_event("startup")
+def report_startup():
+    logger.info("app.main imported in %.0f ms", IMPORT_SECONDS * 1000)
+
+
+@app.on_event("startup")
+def create_tables():
+    # Development only: Alembic owns the schema (see also `python -m app.manage create-all`)
+    if settings.DATABASE_CREATE_ALL_ON_STARTUP:
+        Base.metadata.create_all(bind=engine)
+
+
+@app.on_event("startup")
+def warm_like_graph():
+    if not settings.LIKE_GRAPH_WARM_ON_STARTUP:
+        return
+    from utils.like_graph import get_like_graph
+
+    db = SessionLocal()
+    try:
+        get_like_graph(db)
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def start_visit_buffer():
+    visit_buffer.start()
+
+
+@app.on_event("shutdown")
+def flush_visit_buffer():
+    visit_buffer.stop()
+
 
 # Health check endpoint
 @app.get("/api/health")
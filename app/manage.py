@@ -0,0 +1,85 @@
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import List, Optional, Sequence, Tuple
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def create_all():
+    """
+    Create missing tables from the models. For development databases;
+    everywhere else the schema is managed with `alembic upgrade head`.
+    """
+    import app.models.admin, app.models.engagement, app.models.interaction, app.models.preference  # noqa: F401
+    import app.models.profile, app.models.security, app.models.user  # noqa: F401
+    from app.database import engine
+    from app.models.base import Base
+
+    Base.metadata.create_all(bind=engine)
+    print(f"Created missing tables on {engine.url!r}")
+
+
+def import_times(module: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Import `module` in a fresh interpreter with -X importtime and return
+    (module, depth, self us, cumulative us) for every module it loaded
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    times = []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            times.append((name, (len(indent) - 1) // 2, int(self_us), int(cumulative_us)))
+    return times
+
+
+def import_report(module: str = "app.main", top: int = 15):
+    """
+    Print where importing `module` spends its time: the total, the top-level
+    packages by their own import time, and the slowest modules including
+    what they import
+    """
+    times = import_times(module)
+    total_us = sum(self_us for _, _, self_us, _ in times)
+
+    packages = defaultdict(int)
+    for name, _, self_us, _ in times:
+        packages[name.split(".")[0]] += self_us
+
+    print(f"import {module}: {total_us / 1000:.1f} ms, {len(times)} modules\n")
+    print(f"{'package':<40} {'self ms':>10} {'share':>7}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<40} {self_us / 1000:>10.1f} {self_us / total_us:>7.1%}")
+
+    print(f"\n{'module':<60} {'cumulative ms':>14}")
+    for name, depth, _, cumulative_us in sorted(times, key=lambda t: -t[3])[:top]:
+        print(f"{'  ' * min(depth, 4) + name:<60} {cumulative_us / 1000:>14.1f}")
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Sambandha management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("create-all", help="create missing tables (development; Alembic owns the schema)")
+    report = commands.add_parser("import-report", help="break down the import time of the application")
+    report.add_argument("--module", default="app.main", help="module to import (default: app.main)")
+    report.add_argument("--top", type=int, default=15, help="rows per table")
+    args = parser.parse_args(argv)
+
+    if args.command == "create-all":
+        create_all()
+    elif args.command == "import-report":
+        import_report(args.module, args.top)
+
+
+if __name__ == "__main__":
+    main()
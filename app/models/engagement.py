@@ -1,5 +1,5 @@
 from sqlalchemy import Boolean
-from sqlalchemy import Column, Integer, Float, Text, String, ForeignKey
+from sqlalchemy import Column, Integer, Float, Text, String, ForeignKey, Index, TIMESTAMP, func
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -7,6 +7,9 @@ from app.models.base import Base
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_created_id", "user_id", "created_at", "notification_id"),
+    )
 
     notification_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.user_id"))
@@ -16,6 +19,8 @@ class Notification(Base):
     related_entity_type = Column(String, nullable=True)  # 'user', 'match', 'chat'
     related_entity_id = Column(Integer, nullable=True)
     is_read = Column(Boolean, default=False)
+    # Keyset pagination key, so never NULL
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
 
     # Relationship
     user = relationship("User", back_populates="notifications")
@@ -23,6 +28,9 @@ class Notification(Base):
 
 class Recommendation(Base):
     __tablename__ = "recommendations"
+    __table_args__ = (
+        Index("ix_recommendations_user_source_status_score", "user_id", "source", "status", "recommendation_score"),
+    )
 
     recommendation_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.user_id"))
@@ -30,7 +38,18 @@ class Recommendation(Base):
     recommendation_score = Column(Float)
     reason = Column(Text, nullable=True)
     status = Column(String, default='active')  # 'active', 'viewed', 'interacted'
+    # Job that ranked the row: 'hybrid' (precompute / refresh), 'matchmaker' (parallel sweep)
+    source = Column(String, nullable=False, default='hybrid', server_default='hybrid')
 
     # Relationships
     user = relationship("User", foreign_keys=[user_id], back_populates="recommendations")
     recommended_user = relationship("User", foreign_keys=[recommended_user_id])
+
+
+class RecommendationRefresh(Base):
+    __tablename__ = "recommendation_refresh_queue"
+
+    refresh_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.user_id"))
+    # 'profile_create', 'profile_update', 'preference_create', 'preference_update', 'like', 'status_change'
+    reason = Column(String, nullable=True)
@@ -1 +1 @@
-from .engagement import Notification, Recommendation
\ No newline at end of file
+from .engagement import Notification, Recommendation, RecommendationRefresh
\ No newline at end of file
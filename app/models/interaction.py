@@ -1,17 +1,25 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, TIMESTAMP, Text
+from sqlalchemy import Column, Date, Integer, Index, String, Float, ForeignKey, TIMESTAMP, Text, func
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import text
 
 from app.models.base import Base
 
 
 class Like(Base):
     __tablename__ = "likes"
+    __table_args__ = (
+        Index("uq_likes_liker_liked", "liker_user_id", "liked_user_id", unique=True),  # one like per pair
+        Index("ix_likes_liked_liker", "liked_user_id", "liker_user_id"),
+        # Keyset pagination of sent / received likes
+        Index("ix_likes_liker_created_id", "liker_user_id", "created_at", "like_id"),
+        Index("ix_likes_liked_created_id", "liked_user_id", "created_at", "like_id"),
+    )
 
     like_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     liker_user_id = Column(Integer, ForeignKey("users.user_id"))
     liked_user_id = Column(Integer, ForeignKey("users.user_id"))
     like_type = Column(String, default='like')  # 'like', 'super_like'
+    # Keyset pagination key, so never NULL
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
 
     # Relationships
     liker = relationship("User", foreign_keys=[liker_user_id], back_populates="sent_likes")
@@ -20,12 +28,21 @@ class Like(Base):
 
 class Match(Base):
     __tablename__ = "matches"
+    __table_args__ = (
+        # One match per pair, stored as (smaller id, larger id)
+        Index("uq_matches_user1_user2", "user1_id", "user2_id", unique=True),
+        Index("ix_matches_user2_user1", "user2_id", "user1_id"),
+        Index("ix_matches_user1_created_id", "user1_id", "created_at", "match_id"),
+        Index("ix_matches_user2_created_id", "user2_id", "created_at", "match_id"),
+    )
 
     match_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user1_id = Column(Integer, ForeignKey("users.user_id"))
     user2_id = Column(Integer, ForeignKey("users.user_id"))
     compatibility_score = Column(Float, nullable=True)
     match_status = Column(String, default='active')  # 'active', 'unmatched'
+    # Keyset pagination key, so never NULL
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
 
     # Relationships
     user1 = relationship("User", foreign_keys=[user1_id], back_populates="matches_as_user1")
@@ -39,25 +56,50 @@ class ProfileVisit(Base):
     visit_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     visitor_user_id = Column(Integer, ForeignKey("users.user_id"))
     visited_profile_user_id = Column(Integer, ForeignKey("users.user_id"))
-    visit_timestamp = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
+    visit_timestamp = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+
+class ProfileVisitDaily(Base):
+    """
+    Visits per visited profile, visitor and (UTC) day, maintained from the
+    visit stream so raw profile_visits rows can be purged
+    """
+    __tablename__ = "profile_visit_daily"
+
+    visited_profile_user_id = Column(Integer, ForeignKey("users.user_id"), primary_key=True)
+    visitor_user_id = Column(Integer, ForeignKey("users.user_id"), primary_key=True)
+    visit_date = Column(Date, primary_key=True)
+    visit_count = Column(Integer, nullable=False, default=0)
+    last_visit_at = Column(TIMESTAMP(timezone=True), nullable=False)
 
 
 class Chat(Base):
     __tablename__ = "chats"
+    __table_args__ = (
+        Index("ix_chats_initiator_created_id", "initiator_user_id", "created_at", "chat_id"),
+        Index("ix_chats_receiver_created_id", "receiver_user_id", "created_at", "chat_id"),
+    )
 
     chat_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     match_id = Column(Integer, ForeignKey("matches.match_id"), nullable=True)
     initiator_user_id = Column(Integer, ForeignKey("users.user_id"))
     receiver_user_id = Column(Integer, ForeignKey("users.user_id"))
     state = Column(String, default='request')  # 'request', 'active'
+    # Keyset pagination key, so never NULL
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
 
     # Relationships
+    initiator = relationship("User", foreign_keys=[initiator_user_id])
+    receiver = relationship("User", foreign_keys=[receiver_user_id])
     match = relationship("Match", back_populates="chats")
     messages = relationship("Message", back_populates="chat")
 
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_chat_sent_id", "chat_id", "sent_at", "message_id"),
+    )
 
     message_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     chat_id = Column(Integer, ForeignKey("chats.chat_id"))
@@ -65,7 +107,8 @@ class Message(Base):
     receiver_user_id = Column(Integer, ForeignKey("users.user_id"))
     message_content = Column(Text)
     message_type = Column(String, default='text')  # 'text', 'image_url_in_message', 'intro_request'
-    sent_at = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
+    # Keyset pagination key, so never NULL
+    sent_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
     read_at = Column(TIMESTAMP(timezone=True), nullable=True)
 
     # Relationships
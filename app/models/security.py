@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, Index, String, Text, ForeignKey
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -24,6 +24,10 @@ class UserReport(Base):
 
 class BlockedUser(Base):
     __tablename__ = "blocked_users"
+    __table_args__ = (
+        Index("uq_blocked_users_blocker_blocked", "blocker_user_id", "blocked_user_id", unique=True),
+        Index("ix_blocked_users_blocked_blocker", "blocked_user_id", "blocker_user_id"),
+    )
 
     block_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     blocker_user_id = Column(Integer, ForeignKey("users.user_id"))
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -18,6 +18,20 @@ class LikeInDB(LikeBase):
     like_id: int
     created_at: datetime
 
+class SwipeDecision(BaseSchema):
+    user_id: int
+    action: str  # 'like', 'super_like', 'pass'
+
+class SwipeBatch(BaseSchema):
+    decisions: List[SwipeDecision]
+
+class SwipeBatchResult(BaseSchema):
+    liked: List[int] = []        # new likes stored
+    already_liked: List[int] = []
+    passed: List[int] = []
+    liked_back: List[int] = []   # new likes that are mutual
+    unknown: List[int] = []      # no such user; skipped
+
 class LikeWithUser(LikeInDB):
     liker: UserInDB
     liked: UserInDB
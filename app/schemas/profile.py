@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import date, datetime
 
@@ -83,3 +83,14 @@ class ProfileSummary(BaseSchema):
     profession_text: Optional[str] = None
     primary_profile_image_url: Optional[str] = None
     profile_completion_percentage: int = 0
+
+
+class RecommendationFeedPage(BaseSchema):
+    items: List[ProfileSummary]
+    next_cursor: Optional[str] = None
+
+
+class ProfileVisitorSummary(BaseSchema):
+    visitor: ProfileSummary
+    visit_count: int
+    last_visit_at: datetime
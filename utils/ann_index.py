@@ -0,0 +1,212 @@
+import threading
+import time
+import zlib
+from datetime import date
+from typing import Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.profile import Profile
+from app.models.user import User
+from utils.profile_matrix import (
+    ATTRIBUTE_WEIGHTS, CATEGORICAL_ATTRIBUTES,
+    ProfileMatrix, PROFILE_MATRIX_COLUMNS
+)
+
+# Hashed dimensions for categorical values and hobby tokens; three numeric
+# dimensions (age, height, salary) are appended after them
+HASHED_DIMENSIONS = 256
+NUMERIC_WEIGHT = 0.1
+
+
+def feature_dimension(name: str, value: str, dimensions: int = HASHED_DIMENSIONS) -> int:
+    return zlib.crc32(f"{name}={value}".encode("utf-8")) % dimensions
+
+
+def embed_profiles(matrix: ProfileMatrix, today: Optional[date] = None) -> np.ndarray:
+    """
+    Fixed-length float32 vectors for every row of `matrix`.
+
+    Each categorical value (and the exact salary) is a hashed one-hot scaled by
+    sqrt(weight), so the dot product of two vectors adds `weight` for every
+    matching attribute, like the exact scorer. Hobbies are an L2-normalized
+    hashed token bag scaled the same way. Age, height and salary are appended
+    as small normalized numeric features.
+    """
+    n = len(matrix)
+    vectors = np.zeros((n, HASHED_DIMENSIONS + 3), dtype=np.float32)
+
+    for attr in CATEGORICAL_ATTRIBUTES:
+        vocabulary = matrix.vocabularies[attr]
+        if not vocabulary:
+            continue
+        dimension_of_code = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        for value, code in vocabulary.items():
+            dimension_of_code[code] = feature_dimension(attr, value)
+        column = matrix.columns[attr]
+        rows = np.flatnonzero(column)
+        np.add.at(vectors, (rows, dimension_of_code[column[rows]]), np.sqrt(ATTRIBUTE_WEIGHTS[attr]))
+
+    # Salary only scores on an exact match, so it is hashed like a categorical value
+    salaries = matrix.columns['annual_salary_npr']
+    values, inverse = np.unique(salaries, return_inverse=True)
+    dimension_of_value = np.array([feature_dimension('annual_salary_npr', str(value)) for value in values],
+                                  dtype=np.int64)
+    rows = np.flatnonzero(salaries)
+    np.add.at(vectors, (rows, dimension_of_value[inverse[rows]]), np.sqrt(ATTRIBUTE_WEIGHTS['annual_salary_npr']))
+
+    # Hobby token bag
+    hobbies = matrix.hobbies
+    if hobbies.codes.size:
+        dimension_of_token = np.zeros(len(hobbies.vocabulary), dtype=np.int64)
+        for token, code in hobbies.vocabulary.items():
+            dimension_of_token[code] = feature_dimension('hobby', token)
+        counts = hobbies.counts[hobbies.rows]
+        values = np.sqrt(ATTRIBUTE_WEIGHTS['hobbies_interests'] / counts).astype(np.float32)
+        np.add.at(vectors, (hobbies.rows, dimension_of_token[hobbies.codes]), values)
+
+    # Normalized numeric features (0 when missing)
+    ages = matrix.ages(today)
+    vectors[:, -3] = np.where(matrix.birth_keys > 0, (ages - 18) / 40.0, 0.0) * NUMERIC_WEIGHT
+    vectors[:, -2] = np.where(matrix.heights > 0, (matrix.heights - 140) / 60.0, 0.0) * NUMERIC_WEIGHT
+    salaries = matrix.columns['annual_salary_npr']
+    vectors[:, -1] = np.where(salaries > 0, np.log1p(np.maximum(salaries, 0)) / 20.0, 0.0) * NUMERIC_WEIGHT
+
+    return vectors
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class ProfileANNIndex:
+    """
+    IVF-style approximate nearest neighbour index over profile embeddings.
+
+    Vectors are grouped by spherical k-means into `nlist` inverted lists. A
+    query scores the centroids, scans only the `nprobe` closest lists and
+    ranks their members by dot product, so search cost grows with the size of
+    the probed lists rather than the whole population.
+    """
+
+    def __init__(self, matrix: ProfileMatrix, nlist: Optional[int] = None, iterations: int = 10,
+                 sample_size: int = 20000, seed: int = 0):
+        self.user_ids = matrix.user_ids
+        self.vectors = embed_profiles(matrix)
+        self._positions = {int(user_id): i for i, user_id in enumerate(self.user_ids)}
+        self.built_at = time.monotonic()
+
+        n = len(self.user_ids)
+        self.nlist = max(1, min(nlist or int(np.sqrt(n)), n))
+        unit = normalize_rows(self.vectors)
+
+        # Train centroids on a sample, then assign every vector once
+        rng = np.random.default_rng(seed)
+        sample = unit[rng.choice(n, size=min(sample_size, n), replace=False)] if n else unit
+        centroids = sample[rng.choice(len(sample), size=self.nlist, replace=False)] if n else unit[:0]
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = normalize_rows(sums)
+        self.centroids = centroids
+
+        assignment = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 20000):
+            assignment[start:start + 20000] = np.argmax(unit[start:start + 20000] @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind='stable')
+        self.list_members = order
+        self.list_offsets = np.searchsorted(assignment[order], np.arange(self.nlist + 1))
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def position(self, user_id: int) -> Optional[int]:
+        return self._positions.get(user_id)
+
+    def search(self, user_id: int, limit: int = 3000, nprobe: int = 8) -> np.ndarray:
+        """
+        Up to `limit` user ids with the highest approximate similarity to
+        `user_id` (excluding the user), best first. Empty if the user is not indexed.
+        """
+        row = self.position(user_id)
+        if row is None:
+            return np.zeros(0, dtype=np.int64)
+
+        query = self.vectors[row]
+        unit_query = query / max(float(np.linalg.norm(query)), 1e-12)
+        probes = np.argsort(-(self.centroids @ unit_query))[:nprobe]
+
+        members = np.concatenate([
+            self.list_members[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probes
+        ]) if len(probes) else np.zeros(0, dtype=np.int64)
+        members = members[members != row]
+
+        scores = self.vectors[members] @ query
+        if members.size > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            members, scores = members[top], scores[top]
+        return self.user_ids[members[np.argsort(-scores, kind='stable')]]
+
+
+def evaluate_recall(index: ProfileANNIndex, matrix: ProfileMatrix, user_ids: Sequence[int],
+                    k: int = 10, limit: int = 3000, nprobe: int = 8) -> float:
+    """
+    Mean recall@k of ANN retrieval against exact scoring over the indexed users.
+
+    For each user, the k-th best exact similarity is the threshold; recall is the
+    share of k covered by ANN candidates scoring at or above it, so ties at the
+    boundary are not counted as misses. Hard preference filters are ignored.
+    """
+    indexed = np.isin(matrix.user_ids, index.user_ids)
+    recalls = []
+    for user_id in user_ids:
+        row = matrix.position(user_id)
+        if row is None or index.position(user_id) is None:
+            continue
+
+        scores = np.where(indexed, matrix.similarity(row), -np.inf)
+        scores[row] = -np.inf
+        top = min(k, int(indexed.sum()) - 1)
+        if top <= 0:
+            continue
+        threshold = np.partition(scores, -top)[-top]
+
+        retrieved = matrix.positions(index.search(user_id, limit, nprobe))
+        retrieved = retrieved[retrieved >= 0]
+        hits = int(np.count_nonzero(scores[retrieved] >= threshold))
+        recalls.append(min(hits, top) / top)
+
+    return float(np.mean(recalls)) if recalls else 0.0
+
+
+_ann_index: Optional[ProfileANNIndex] = None
+_ann_lock = threading.Lock()
+
+
+def build_ann_index(db: Session, **kwargs) -> ProfileANNIndex:
+    """
+    Build an index over every active profile
+    """
+    matrix = ProfileMatrix.from_query(
+        db.query(*PROFILE_MATRIX_COLUMNS)
+        .join(User, User.user_id == Profile.user_id)
+        .filter(User.account_status == 'active')
+        .order_by(Profile.user_id)
+    )
+    return ProfileANNIndex(matrix, **kwargs)
+
+
+def get_ann_index(db: Session, max_age_seconds: float) -> ProfileANNIndex:
+    """
+    Process-wide index, rebuilt once it is older than `max_age_seconds`
+    """
+    global _ann_index
+    with _ann_lock:
+        if _ann_index is None or time.monotonic() - _ann_index.built_at > max_age_seconds:
+            _ann_index = build_ann_index(db)
+        return _ann_index
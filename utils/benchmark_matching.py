@@ -0,0 +1,224 @@
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+import utils.ann_index
+import utils.eligibility_index
+import utils.like_graph
+from app.config import settings
+from app.models.base import Base
+from app.models.profile import Profile
+from app.models.user import User
+from utils.matchmaker import MatchMaker
+from utils.recommender import Recommender, recommendation_cache
+from utils.synthetic_population import create_database_engine, generate_population
+
+logger = logging.getLogger(__name__)
+
+
+def hybrid_recommendation(db: Session, user_id: int):
+    return Recommender(db).hybrid_recommendation(user_id, limit=10)
+
+
+def find_potential_matches(db: Session, user_id: int):
+    return MatchMaker(db).find_potential_matches(user_id, limit=10)
+
+
+OPERATIONS: Dict[str, Callable[[Session, int], object]] = {
+    'hybrid_recommendation': hybrid_recommendation,
+    'find_potential_matches': find_potential_matches,
+}
+
+
+class QueryCounter:
+    """
+    Counts statements executed on an engine while active
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+
+def reset_process_state():
+    """
+    Drop every process-wide index and cache so the next call starts cold
+    """
+    utils.like_graph._like_graph = utils.like_graph.LikeGraph()
+    utils.ann_index._ann_index = None
+    utils.eligibility_index._eligibility_index = None
+    recommendation_cache.clear()
+
+
+def measure(engine: Engine, db: Session, operation: Callable, user_id: int, trace_memory: bool = False) -> Dict:
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with QueryCounter(engine) as queries:
+            started = time.perf_counter()
+            operation(db, user_id)
+            elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    db.rollback()
+    return {'seconds': elapsed, 'queries': queries.count, 'peak_bytes': peak}
+
+
+def benchmark_operation(engine: Engine, db: Session, name: str, user_ids: Sequence[int]) -> Dict:
+    """
+    Cold call (process-wide indexes built from scratch), then one warm call per
+    sampled user, then peak traced memory of a cold and a warm call
+    """
+    operation = OPERATIONS[name]
+
+    reset_process_state()
+    cold = measure(engine, db, operation, user_ids[0])
+    warm = [measure(engine, db, operation, user_id) for user_id in user_ids]
+    warm_peak = measure(engine, db, operation, user_ids[0], trace_memory=True)['peak_bytes']
+    reset_process_state()
+    cold_peak = measure(engine, db, operation, user_ids[0], trace_memory=True)['peak_bytes']
+
+    latencies = np.asarray([sample['seconds'] for sample in warm]) * 1000
+    queries = np.asarray([sample['queries'] for sample in warm])
+    return {
+        'operation': name,
+        'samples': len(warm),
+        'cold_ms': round(cold['seconds'] * 1000, 3),
+        'cold_queries': cold['queries'],
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'max_ms': round(float(latencies.max()), 3),
+        'mean_queries': round(float(queries.mean()), 2),
+        'max_queries': int(queries.max()),
+        'peak_memory_mib': round(warm_peak / 2 ** 20, 3),
+        'cold_peak_memory_mib': round(cold_peak / 2 ** 20, 3),
+    }
+
+
+def prepare_database(url: str, users: int, seed: int, regenerate: bool) -> Engine:
+    engine = create_database_engine(url)
+    if regenerate:
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+
+    db = sessionmaker(bind=engine)()
+    try:
+        existing = db.query(User).count()
+        if existing == 0:
+            started = time.perf_counter()
+            counts = generate_population(db, users, seed)
+            logger.info("Generated %s in %.1fs", counts, time.perf_counter() - started)
+        elif existing != users:
+            logger.warning("%s already holds %d users (asked for %d); using it as is", url, existing, users)
+    finally:
+        db.close()
+    return engine
+
+
+def sample_user_ids(db: Session, samples: int, seed: int) -> List[int]:
+    user_ids = [row[0] for row in db.query(User.user_id).join(Profile, Profile.user_id == User.user_id).filter(
+        User.account_status == 'active'
+    ).order_by(User.user_id).all()]
+    rng = np.random.default_rng(seed)
+    return rng.choice(user_ids, size=min(samples, len(user_ids)), replace=False).tolist()
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+        sizes: Sequence[int],
+        database_url: str,
+        operations: Sequence[str],
+        samples: int = 20,
+        seed: int = 0,
+        regenerate: bool = False
+) -> Dict:
+    results = []
+    for size in sizes:
+        url = database_url.format(size=size)
+        engine = prepare_database(url, size, seed, regenerate)
+        db = sessionmaker(bind=engine)()
+        try:
+            user_ids = sample_user_ids(db, samples, seed)
+            for name in operations:
+                result = benchmark_operation(engine, db, name, user_ids)
+                result['users'] = size
+                results.append(result)
+                logger.info("%d users, %s: p50 %.1fms, p95 %.1fms, %.1f queries, peak %.1f MiB",
+                            size, name, result['p50_ms'], result['p95_ms'],
+                            result['mean_queries'], result['peak_memory_mib'])
+        finally:
+            db.close()
+            engine.dispose()
+        reset_process_state()
+
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'settings': {
+            'ANN_MIN_POPULATION': settings.ANN_MIN_POPULATION,
+            'ANN_CANDIDATES': settings.ANN_CANDIDATES,
+            'ELIGIBILITY_MIN_POPULATION': settings.ELIGIBILITY_MIN_POPULATION,
+        },
+        'results': results,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the recommender and matchmaker on synthetic populations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--database-url", default="sqlite:///benchmark_{size}.db",
+                        help="one database per size; '{size}' is replaced by the population size")
+    parser.add_argument("--operation", action="append", dest="operations", choices=sorted(OPERATIONS),
+                        help="operation to benchmark (repeatable, default: all)")
+    parser.add_argument("--samples", type=int, default=20, help="users timed per size and operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--regenerate", action="store_true", help="drop and regenerate existing databases")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    report = run_benchmarks(
+        args.sizes, args.database_url, args.operations or list(OPERATIONS),
+        args.samples, args.seed, args.regenerate
+    )
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info("Wrote %s", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, model):
+    """
+    INSERT statement for the session's database, so PostgreSQL and SQLite
+    callers get on_conflict_do_nothing / on_conflict_do_update
+    """
+    if db.get_bind().dialect.name == 'sqlite':
+        return sqlite.insert(model)
+    return postgresql.insert(model)
@@ -0,0 +1,183 @@
+from datetime import date
+from typing import List, Optional, Sequence
+
+from sqlalchemy import and_, exists, literal, or_
+from sqlalchemy.orm import Query, Session
+
+from app.models.engagement import Recommendation
+from app.models.interaction import Like, Match
+from app.models.preference import Preference
+from app.models.profile import Profile
+from app.models.security import BlockedUser
+from app.models.user import User
+from utils.profile_matrix import split_preference_list
+
+
+def years_before(today: date, years: int) -> date:
+    """
+    The date `years` before `today` (Feb 29 maps to Feb 28 in non-leap years)
+    """
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        return today.replace(year=today.year - years, day=28)
+
+
+def calculate_age(dob: date, today: date) -> int:
+    return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+
+def is_unset(column):
+    return or_(column.is_(None), column == 0)
+
+
+def is_blank(column):
+    return or_(column.is_(None), column == '')
+
+
+def preference_filters(pref, today: date) -> List:
+    """
+    SQL criteria on Profile equivalent to the hard filters of `pref`
+    (age, height, religion, caste). Missing profile values never fail a filter.
+    """
+    if not pref:
+        return []
+
+    criteria = []
+    if pref.min_age:
+        # age >= min_age  <=>  born on or before the min_age-th birthday cutoff
+        criteria.append(or_(
+            Profile.date_of_birth.is_(None),
+            Profile.date_of_birth <= years_before(today, pref.min_age)
+        ))
+    if pref.max_age:
+        # age <= max_age  <=>  not yet max_age + 1
+        criteria.append(or_(
+            Profile.date_of_birth.is_(None),
+            Profile.date_of_birth > years_before(today, pref.max_age + 1)
+        ))
+
+    if pref.min_height_cm:
+        criteria.append(or_(is_unset(Profile.height_cm), Profile.height_cm >= pref.min_height_cm))
+    if pref.max_height_cm:
+        criteria.append(or_(is_unset(Profile.height_cm), Profile.height_cm <= pref.max_height_cm))
+
+    if pref.preferred_religions_text:
+        criteria.append(or_(
+            is_blank(Profile.religion_text),
+            Profile.religion_text.in_(split_preference_list(pref.preferred_religions_text))
+        ))
+    if pref.preferred_castes_text:
+        criteria.append(or_(
+            is_blank(Profile.caste_text),
+            Profile.caste_text.in_(split_preference_list(pref.preferred_castes_text))
+        ))
+
+    return criteria
+
+
+def list_contains(column, value: str):
+    """
+    Whether the comma-separated list in `column` contains exactly `value`
+    """
+    return (literal(',') + column + literal(',')).contains(f",{value},", autoescape=True)
+
+
+def reverse_preference_filters(profile, today: date) -> List:
+    """
+    SQL criteria on a candidate's Preference row accepting `profile`.
+    Unset bounds and blank lists accept everyone.
+    """
+    criteria = []
+    if profile.date_of_birth:
+        age = calculate_age(profile.date_of_birth, today)
+        criteria.append(or_(is_unset(Preference.min_age), Preference.min_age <= age))
+        criteria.append(or_(is_unset(Preference.max_age), Preference.max_age >= age))
+
+    if profile.height_cm:
+        criteria.append(or_(is_unset(Preference.min_height_cm), Preference.min_height_cm <= profile.height_cm))
+        criteria.append(or_(is_unset(Preference.max_height_cm), Preference.max_height_cm >= profile.height_cm))
+
+    if profile.religion_text:
+        criteria.append(or_(
+            is_blank(Preference.preferred_religions_text),
+            list_contains(Preference.preferred_religions_text, profile.religion_text)
+        ))
+    if profile.caste_text:
+        criteria.append(or_(
+            is_blank(Preference.preferred_castes_text),
+            list_contains(Preference.preferred_castes_text, profile.caste_text)
+        ))
+
+    return criteria
+
+
+def candidate_query(
+        db: Session,
+        user_id: int,
+        columns: List,
+        pref=None,
+        profile=None,
+        reciprocal: bool = False,
+        exclude_matched: bool = False,
+        exclude_recommended: bool = False,
+        exclude_interacted: bool = False,
+        user_ids: Optional[Sequence[int]] = None,
+        today: Optional[date] = None
+) -> Query:
+    """
+    Query selecting `columns` for every active user that can be a candidate for
+    `user_id`, plus the user's own row (callers need it to score against).
+
+    Hard preference filters are pushed down into SQL. With `reciprocal`, both
+    directions are checked, and only when the candidate also has preferences,
+    mirroring MatchMaker. Blocked users (either direction) are always excluded;
+    existing matches and recommendations are excluded on request, as are
+    users already acted upon (recommendations marked 'interacted' and users
+    `user_id` has liked) with `exclude_interacted`. `user_ids`
+    restricts the candidates to a pre-selected set (e.g. ANN retrieval).
+    """
+    today = today or date.today()
+    query = db.query(*columns).join(User, User.user_id == Profile.user_id)
+
+    criteria = [
+        User.account_status == 'active',
+        ~exists().where(or_(
+            and_(BlockedUser.blocker_user_id == user_id, BlockedUser.blocked_user_id == Profile.user_id),
+            and_(BlockedUser.blocker_user_id == Profile.user_id, BlockedUser.blocked_user_id == user_id)
+        ))
+    ]
+
+    if reciprocal:
+        query = query.outerjoin(Preference, Preference.user_id == Profile.user_id)
+        if pref and profile:
+            mutual = preference_filters(pref, today) + reverse_preference_filters(profile, today)
+            if mutual:
+                criteria.append(or_(Preference.preference_id.is_(None), and_(*mutual)))
+    else:
+        criteria.extend(preference_filters(pref, today))
+
+    if exclude_matched:
+        criteria.append(~exists().where(or_(
+            and_(Match.user1_id == user_id, Match.user2_id == Profile.user_id),
+            and_(Match.user1_id == Profile.user_id, Match.user2_id == user_id)
+        )))
+
+    if user_ids is not None:
+        criteria.append(Profile.user_id.in_(user_ids))
+
+    if exclude_recommended:
+        criteria.append(~exists().where(
+            Recommendation.user_id == user_id,
+            Recommendation.recommended_user_id == Profile.user_id
+        ))
+
+    if exclude_interacted:
+        criteria.append(~exists().where(
+            Recommendation.user_id == user_id,
+            Recommendation.recommended_user_id == Profile.user_id,
+            Recommendation.status == 'interacted'
+        ))
+        criteria.append(~exists().where(Like.liker_user_id == user_id, Like.liked_user_id == Profile.user_id))
+
+    return query.filter(or_(Profile.user_id == user_id, and_(*criteria))).order_by(Profile.user_id)
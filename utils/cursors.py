@@ -0,0 +1,25 @@
+import base64
+import json
+from typing import Any, Dict
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """
+    Opaque, URL-safe cursor for a JSON-serializable payload
+    """
+    data = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Payload of a cursor made by encode_cursor; raises ValueError if it is malformed
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(data)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Malformed cursor") from exc
+    if not isinstance(payload, dict):
+        raise ValueError("Malformed cursor")
+    return payload
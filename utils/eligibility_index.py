@@ -0,0 +1,223 @@
+import threading
+import time
+from datetime import date
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.preference import Preference
+from app.models.profile import Profile
+from app.models.user import User
+from utils.profile_matrix import (
+    ProfileMatrix, PreferenceMatrix,
+    PROFILE_MATRIX_COLUMNS, PREFERENCE_MATRIX_COLUMNS
+)
+
+LIST_ATTRIBUTES = ('religion_text', 'caste_text')
+
+
+def pack(mask: np.ndarray) -> np.ndarray:
+    return np.packbits(mask, bitorder='little')
+
+
+def group_bitmaps(groups: np.ndarray, rows: np.ndarray, count: int, size: int,
+                  base: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    One packed bitmap per group value in [0, count): bit `row` is set in
+    bitmap `group` for every (group, row) pair, on top of `base` if given
+    """
+    bitmaps = np.tile(base, (count, 1)) if base is not None else np.zeros((count, (size + 7) // 8), dtype=np.uint8)
+    np.bitwise_or.at(bitmaps, (groups, rows >> 3), np.left_shift(1, rows & 7).astype(np.uint8))
+    return bitmaps
+
+
+class EligibilityIndex:
+    """
+    Packed bitmaps answering the hard-filter side of reciprocal matching.
+
+    Profile side ("who do I accept"): per age and height value, cumulative
+    bitmaps of the rows at most that value, and per religion/caste code the
+    rows holding it, so a preference becomes a few bitmap ANDs/ORs.
+    Preference side ("who accepts me"): per age and height value, the rows
+    whose lower (upper) bound admits it, and per religion/caste code the rows
+    whose list is empty or contains it.
+
+    Mutual eligibility follows MatchMaker: filters apply only when both users
+    have preferences, and missing profile values never fail a filter. Ages are
+    computed once, at build time.
+    """
+
+    def __init__(self, matrix: ProfileMatrix, preferences: PreferenceMatrix, today: Optional[date] = None):
+        self.matrix = matrix
+        self.preferences = preferences
+        self.size = n = len(matrix)
+        self.built_at = time.monotonic()
+
+        rows = np.arange(n, dtype=np.int64)
+        self.all_rows = pack(np.ones(n, dtype=bool))
+        self.without_preference = pack(~preferences.has_preference)
+
+        # Numeric bounds: (values, lower bounds, upper bounds) per attribute; 0 is "missing"/"unset"
+        ages = np.where(matrix.birth_keys > 0, matrix.ages(today), 0)
+        self.values = {'age': ages, 'height': matrix.heights}
+        self.numeric = {}
+        for name, values, lower, upper in (
+                ('age', ages, preferences.min_age, preferences.max_age),
+                ('height', matrix.heights, preferences.min_height, preferences.max_height)
+        ):
+            known = values > 0
+            lo = int(values[known].min()) if known.any() else 0
+            hi = int(values[known].max()) if known.any() else 0
+            count = hi - lo + 1
+
+            # Rows with a known value at most lo + i
+            at_most = np.bitwise_or.accumulate(
+                group_bitmaps(values[known] - lo, rows[known], count, n), axis=0
+            )
+
+            # Rows whose lower bound admits lo + i (unset, or bound <= lo + i)
+            has_lower = (lower > 0) & (lower <= hi)
+            lower_admits = np.bitwise_or.accumulate(group_bitmaps(
+                np.maximum(lower[has_lower] - lo, 0), rows[has_lower], count, n, base=pack(lower == 0)
+            ), axis=0)
+
+            # Rows whose upper bound admits lo + i (unset, or bound >= lo + i)
+            has_upper = (upper > 0) & (upper >= lo)
+            upper_admits = np.bitwise_or.accumulate(group_bitmaps(
+                np.minimum(upper[has_upper], hi) - lo, rows[has_upper], count, n, base=pack(upper == 0)
+            )[::-1], axis=0)[::-1]
+
+            self.numeric[name] = (lo, hi, pack(~known), at_most, lower_admits, upper_admits)
+
+        # Preference lists: rows holding each code (0 = blank) and rows whose list admits it
+        self.holding = {}
+        self.admitting = {}
+        self.list_offsets = {}
+        self.list_codes = {}
+        for attr in LIST_ATTRIBUTES:
+            count = len(matrix.vocabularies[attr]) + 1
+            self.holding[attr] = group_bitmaps(matrix.columns[attr].astype(np.int64), rows, count, n)
+
+            list_rows, list_codes = preferences.list_rows[attr], preferences.list_codes[attr]
+            known = list_codes > 0
+            self.admitting[attr] = group_bitmaps(
+                list_codes[known].astype(np.int64), list_rows[known], count, n, base=pack(~preferences.has_list[attr])
+            )
+
+            order = np.argsort(list_rows, kind='stable')
+            self.list_codes[attr] = list_codes[order]
+            self.list_offsets[attr] = np.searchsorted(list_rows[order], np.arange(n + 1))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _range(self, name: str, minimum: int, maximum: int) -> np.ndarray:
+        """
+        Rows with a missing value or a value within [minimum, maximum] (0 = unbounded)
+        """
+        lo, hi, missing, at_most, _, _ = self.numeric[name]
+
+        def rows_at_most(value: int) -> np.ndarray:
+            if value < lo:
+                return np.zeros_like(missing)
+            return at_most[min(value, hi) - lo]
+
+        within = ~missing
+        if maximum:
+            within = within & rows_at_most(maximum)
+        if minimum:
+            within = within & ~rows_at_most(minimum - 1)
+        return missing | within
+
+    def accepted_by(self, row: int) -> np.ndarray:
+        """
+        Rows passing the hard filters of the preferences at `row` (all rows if none)
+        """
+        preferences = self.preferences
+        if not preferences.has_preference[row]:
+            return self.all_rows
+
+        bitmap = self._range('age', preferences.min_age[row], preferences.max_age[row])
+        bitmap &= self._range('height', preferences.min_height[row], preferences.max_height[row])
+
+        for attr in LIST_ATTRIBUTES:
+            if preferences.has_list[attr][row]:
+                codes = self.list_codes[attr][self.list_offsets[attr][row]:self.list_offsets[attr][row + 1]]
+                holding = self.holding[attr]
+                # Blank profile values always pass; unknown listed values match nobody
+                bitmap &= np.bitwise_or.reduce(holding[np.append(codes[codes > 0], 0)], axis=0)
+        return bitmap
+
+    def accepting(self, row: int) -> np.ndarray:
+        """
+        Rows whose preferences admit the profile at `row` (rows without preferences admit everyone)
+        """
+        bitmap = self.all_rows.copy()
+        for name in ('age', 'height'):
+            value = self.values[name][row]
+            if value:
+                lo, _, _, _, lower_admits, upper_admits = self.numeric[name]
+                bitmap &= lower_admits[value - lo] & upper_admits[value - lo]
+
+        for attr in LIST_ATTRIBUTES:
+            code = self.matrix.columns[attr][row]
+            if code:
+                bitmap &= self.admitting[attr][code]
+        return bitmap
+
+    def mutual(self, row: int) -> np.ndarray:
+        """
+        Rows mutually eligible with `row`, including `row` itself
+        """
+        if not self.preferences.has_preference[row]:
+            return self.all_rows
+        return self.without_preference | (self.accepted_by(row) & self.accepting(row))
+
+    def rows(self, bitmap: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.size, bitorder='little'))
+
+    def mutual_user_ids(self, user_id: int) -> Optional[np.ndarray]:
+        """
+        User ids mutually eligible with `user_id` (excluding the user), or None if not indexed
+        """
+        row = self.matrix.position(user_id)
+        if row is None:
+            return None
+        rows = self.rows(self.mutual(row))
+        return self.matrix.user_ids[rows[rows != row]]
+
+
+_eligibility_index: Optional[EligibilityIndex] = None
+_eligibility_lock = threading.Lock()
+
+
+def build_eligibility_index(db: Session) -> EligibilityIndex:
+    """
+    Build an index over every active profile and its preferences
+    """
+    matrix = ProfileMatrix.from_query(
+        db.query(*PROFILE_MATRIX_COLUMNS)
+        .join(User, User.user_id == Profile.user_id)
+        .filter(User.account_status == 'active')
+        .order_by(Profile.user_id)
+    )
+    preferences = PreferenceMatrix(
+        db.query(*PREFERENCE_MATRIX_COLUMNS)
+        .join(User, User.user_id == Preference.user_id)
+        .filter(User.account_status == 'active')
+        .all(),
+        matrix
+    )
+    return EligibilityIndex(matrix, preferences)
+
+
+def get_eligibility_index(db: Session, max_age_seconds: float) -> EligibilityIndex:
+    """
+    Process-wide index, rebuilt once it is older than `max_age_seconds`
+    """
+    global _eligibility_index
+    with _eligibility_lock:
+        if _eligibility_index is None or time.monotonic() - _eligibility_index.built_at > max_age_seconds:
+            _eligibility_index = build_eligibility_index(db)
+        return _eligibility_index
@@ -0,0 +1,106 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+# Bits set in every byte value, for popcount on NumPy versions without np.bitwise_count
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def normalize_hobby(token: str) -> str:
+    return " ".join(token.split()).lower()
+
+
+def hobby_tokens(text: Optional[str]) -> Set[str]:
+    """
+    Normalized hobby set of a comma-separated `hobbies_interests` value
+    """
+    if not text:
+        return set()
+    tokens = (normalize_hobby(token) for token in text.split(','))
+    return {token for token in tokens if token}
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """
+    Number of set bits per row of a 2-D uint64 array
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    as_bytes = np.ascontiguousarray(words).view(np.uint8).reshape(words.shape[0], -1)
+    return _BYTE_POPCOUNT[as_bytes].sum(axis=1, dtype=np.int64)
+
+
+class HobbyIndex:
+    """
+    Hobbies of a batch of profiles, normalized once.
+
+    Each row's hobby set is a packed bitset (one bit per vocabulary token,
+    64 per uint64 word) so Jaccard is a popcount of AND over popcount of OR.
+    An inverted index (token -> rows) answers "who shares a hobby" directly.
+    """
+
+    def __init__(self, texts: Iterable[Optional[str]]):
+        self.vocabulary: Dict[str, int] = {}
+        rows: List[int] = []
+        codes: List[int] = []
+        n = 0
+        for row, text in enumerate(texts):
+            n = row + 1
+            for token in hobby_tokens(text):
+                code = self.vocabulary.setdefault(token, len(self.vocabulary))
+                rows.append(row)
+                codes.append(code)
+
+        # Flat (row, token) pairs in row order
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.codes = np.asarray(codes, dtype=np.int64)
+        self.counts = np.bincount(self.rows, minlength=n).astype(np.int64)
+        self.row_offsets = np.concatenate(([0], np.cumsum(self.counts)))
+
+        words = max(1, (len(self.vocabulary) + 63) // 64)
+        self.bitsets = np.zeros((n, words), dtype=np.uint64)
+        np.bitwise_or.at(
+            self.bitsets,
+            (self.rows, self.codes // 64),
+            np.left_shift(np.uint64(1), (self.codes % 64).astype(np.uint64))
+        )
+
+        # Inverted index: rows holding each token, grouped by token code
+        order = np.argsort(self.codes, kind='stable')
+        self.posting_rows = self.rows[order]
+        self.posting_offsets = np.searchsorted(self.codes[order], np.arange(len(self.vocabulary) + 1))
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def jaccard(self, row: int) -> np.ndarray:
+        """
+        Jaccard similarity of the hobbies of `row` with every row (0 where either is empty)
+        """
+        n = len(self)
+        own = self.bitsets[row]
+        own_count = self.counts[row]
+        if own_count == 0:
+            return np.zeros(n)
+
+        # Only the words where `row` has bits can contribute to the intersection
+        words = np.flatnonzero(own)
+        intersection = popcount(self.bitsets[:, words] & own[words])
+        union = self.counts + own_count - intersection
+        return np.divide(intersection, union, out=np.zeros(n), where=self.counts > 0)
+
+    def rows_with(self, token: str) -> np.ndarray:
+        code = self.vocabulary.get(normalize_hobby(token))
+        if code is None:
+            return np.zeros(0, dtype=np.int64)
+        return self.posting_rows[self.posting_offsets[code]:self.posting_offsets[code + 1]]
+
+    def rows_sharing(self, row: int) -> np.ndarray:
+        """
+        Rows sharing at least one hobby with `row` (including `row` itself)
+        """
+        own = self.codes[self.row_offsets[row]:self.row_offsets[row + 1]]
+        if own.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        postings = [self.posting_rows[self.posting_offsets[c]:self.posting_offsets[c + 1]] for c in own]
+        return np.unique(np.concatenate(postings))
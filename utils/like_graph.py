@@ -0,0 +1,258 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from app.models.interaction import Like
+
+
+class LikeGraph:
+    """
+    Liker x liked adjacency of the likes table as a scipy.sparse CSR matrix,
+    plus its transpose for incoming likes. Each row is a sorted int array.
+
+    Users are mapped to dense indices in the order they are first seen. The
+    graph is refreshed incrementally from the highest like_id already loaded,
+    so keeping it current costs one small query per refresh. New likes,
+    whether loaded by a refresh or recorded in-process with add_like, are
+    kept in small per-user sets on top of the CSR, merged into every lookup
+    (similar_users and recommend included), until `compact_threshold` of
+    them accumulate and are compacted into it.
+    """
+
+    def __init__(self, compact_threshold: int = 10000):
+        self.user_ids = np.zeros(0, dtype=np.int64)
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.int32)
+        self.incoming = sparse.csr_matrix((0, 0), dtype=np.int32)
+        self.last_like_id = 0
+        self.compact_threshold = compact_threshold
+        self._index: Dict[int, int] = {}
+        self._recent_out: Dict[int, Set[int]] = {}
+        self._recent_in: Dict[int, Set[int]] = {}
+        self._recent_count = 0
+        self._lock = threading.RLock()
+
+    def __getstate__(self):
+        # Locks cannot be pickled and the index is implied by user_ids
+        state = self.__dict__.copy()
+        del state['_lock'], state['_index']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._index = {int(user_id): i for i, user_id in enumerate(self.user_ids)}
+        self._lock = threading.RLock()
+
+    def refresh(self, db: Session) -> int:
+        """
+        Load likes created since the last refresh. Returns the number of new likes.
+        """
+        with self._lock:
+            new_likes = db.query(Like.like_id, Like.liker_user_id, Like.liked_user_id).filter(
+                Like.like_id > self.last_like_id
+            ).order_by(Like.like_id).all()
+
+            if not new_likes:
+                return 0
+            if self._recent_count + len(new_likes) >= self.compact_threshold:
+                # Large batches (the initial load) go straight into the CSR
+                self.add_edges([(liker, liked) for _, liker, liked in new_likes] + self._take_recent())
+            else:
+                for _, liker, liked in new_likes:
+                    self._add_recent(liker, liked)
+            self.last_like_id = new_likes[-1][0]
+            return len(new_likes)
+
+    def add_like(self, liker_id: int, liked_id: int):
+        """
+        Record a committed like without a database round trip
+        """
+        with self._lock:
+            self._add_recent(liker_id, liked_id)
+            if self._recent_count >= self.compact_threshold:
+                self.add_edges(self._take_recent())
+
+    def _add_recent(self, liker_id: int, liked_id: int):
+        if self.has_liked(liker_id, liked_id):
+            return
+        self._recent_out.setdefault(liker_id, set()).add(liked_id)
+        self._recent_in.setdefault(liked_id, set()).add(liker_id)
+        self._recent_count += 1
+
+    def _take_recent(self) -> List[Tuple[int, int]]:
+        edges = [(liker, liked) for liker, liked_ids in self._recent_out.items() for liked in liked_ids]
+        self._recent_out, self._recent_in, self._recent_count = {}, {}, 0
+        return edges
+
+    def add_edges(self, edges: Iterable[Tuple[int, int]]):
+        with self._lock:
+            rows, cols, new_ids = [], [], []
+            for liker_id, liked_id in edges:
+                rows.append(self._ensure_index(liker_id, new_ids))
+                cols.append(self._ensure_index(liked_id, new_ids))
+            if new_ids:
+                self.user_ids = np.concatenate((self.user_ids, np.asarray(new_ids, dtype=np.int64)))
+
+            n = len(self.user_ids)
+            new = sparse.csr_matrix(
+                (np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(n, n)
+            )
+            matrix = self.matrix.copy()
+            matrix.resize((n, n))
+            matrix = (matrix + new).tocsr()
+            # Duplicate like rows collapse into a single edge
+            matrix.data[:] = 1
+            matrix.sort_indices()
+            incoming = matrix.T.tocsr()
+            incoming.sort_indices()
+            self.matrix, self.incoming = matrix, incoming
+
+    def _ensure_index(self, user_id: int, new_ids: List[int]) -> int:
+        index = self._index.get(user_id)
+        if index is None:
+            index = len(self._index)
+            self._index[user_id] = index
+            new_ids.append(user_id)
+        return index
+
+    def index_of(self, user_id: int) -> Optional[int]:
+        return self._index.get(user_id)
+
+    def _row(self, matrix: sparse.csr_matrix, user_id: int, recent: Dict[int, Set[int]]) -> np.ndarray:
+        index = self.index_of(user_id)
+        ids = np.zeros(0, dtype=np.int64)
+        if index is not None:
+            ids = self.user_ids[matrix.indices[matrix.indptr[index]:matrix.indptr[index + 1]]]
+        extra = recent.get(user_id)
+        if extra:
+            ids = np.union1d(ids, np.fromiter(extra, dtype=np.int64, count=len(extra)))
+        return ids
+
+    def liked_by(self, user_id: int) -> np.ndarray:
+        """
+        User ids liked by `user_id`
+        """
+        with self._lock:
+            return self._row(self.matrix, user_id, self._recent_out)
+
+    def liked_me(self, user_id: int) -> np.ndarray:
+        """
+        User ids who have liked `user_id`
+        """
+        with self._lock:
+            return self._row(self.incoming, user_id, self._recent_in)
+
+    def has_liked(self, liker_id: int, liked_id: int) -> bool:
+        with self._lock:
+            if liked_id in self._recent_out.get(liker_id, ()):
+                return True
+            liker, liked = self.index_of(liker_id), self.index_of(liked_id)
+            if liker is None or liked is None:
+                return False
+            row = self.matrix.indices[self.matrix.indptr[liker]:self.matrix.indptr[liker + 1]]
+            position = np.searchsorted(row, liked)
+            return bool(position < row.size and row[position] == liked)
+
+    def like_count_between(self, user1_id: int, user2_id: int) -> int:
+        """
+        Number of directions in which the two users have liked each other (0, 1 or 2)
+        """
+        return int(self.has_liked(user1_id, user2_id)) + int(self.has_liked(user2_id, user1_id))
+
+    def mutual_likes(self, user_id: int) -> np.ndarray:
+        """
+        User ids that `user_id` has liked and who have liked `user_id` back
+        """
+        with self._lock:
+            return np.intersect1d(self.liked_by(user_id), self.liked_me(user_id), assume_unique=True)
+
+    def pending_likes(self, user_id: int) -> np.ndarray:
+        """
+        User ids who have liked `user_id` and have not been liked back
+        """
+        with self._lock:
+            return np.setdiff1d(self.liked_me(user_id), self.liked_by(user_id), assume_unique=True)
+
+    def similar_users(self, user_id: int, limit: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        User ids of the users sharing the most liked profiles with `user_id`,
+        and the number of profiles they share, most similar first
+        """
+        with self._lock:
+            liked = self.liked_by(user_id)
+            if liked.size == 0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+            # Likers of every profile `user_id` liked (CSR rows plus recent likes),
+            # one entry per shared like: common likes with every neighbour
+            likers = np.concatenate([self.liked_me(liked_id) for liked_id in liked.tolist()])
+            neighbours, counts = np.unique(likers, return_counts=True)
+            keep = neighbours != user_id
+            neighbours, counts = neighbours[keep], counts[keep]
+
+            if neighbours.size > limit:
+                top = np.argpartition(-counts, limit - 1)[:limit]
+                neighbours, counts = neighbours[top], counts[top]
+            order = np.lexsort((neighbours, -counts))
+            return neighbours[order], counts[order]
+
+    def recommend(
+            self,
+            user_id: int,
+            limit: Optional[int] = 10,
+            neighbours: int = 5,
+            exclude: Iterable[int] = ()
+    ) -> List[Tuple[int, float]]:
+        """
+        Profiles liked by the most similar users that `user_id` has not liked yet.
+
+        Each similar user contributes (shared likes / likes of `user_id`); a
+        candidate's score is the sum over the similar users who liked it,
+        capped at 1.0. Returns up to `limit` (all if None) (user_id, score)
+        pairs, best first.
+        """
+        with self._lock:
+            # Including likes not compacted into the CSR yet
+            own_likes = self.liked_by(user_id)
+            similar, counts = self.similar_users(user_id, neighbours)
+            if own_likes.size == 0 or similar.size == 0:
+                return []
+
+            # Weighted sum over the similar users' like rows
+            weights = np.minimum(counts / own_likes.size, 1.0)
+            rows = [self.liked_by(similar_id) for similar_id in similar.tolist()]
+            candidates, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+            values = np.bincount(inverse, weights=np.repeat(weights, [row.size for row in rows]))
+            values = np.minimum(values, 1.0)
+
+            masked = np.isin(candidates, np.concatenate((
+                own_likes, np.asarray([user_id, *exclude], dtype=np.int64)
+            )))
+            candidates, values = candidates[~masked], values[~masked]
+
+            if limit is not None and candidates.size > limit:
+                top = np.argpartition(-values, limit - 1)[:limit]
+                candidates, values = candidates[top], values[top]
+            order = np.lexsort((candidates, -values))
+
+            return [(int(c), float(v)) for c, v in zip(candidates[order], values[order])]
+
+
+_like_graph = LikeGraph()
+
+
+def get_like_graph(db: Session) -> LikeGraph:
+    """
+    Process-wide like graph, brought up to date with the likes table
+    """
+    _like_graph.refresh(db)
+    return _like_graph
+
+
+def record_like(liker_id: int, liked_id: int):
+    """
+    Add a just-committed like to the process-wide graph
+    """
+    _like_graph.add_like(liker_id, liked_id)
@@ -0,0 +1,33 @@
+from sqlalchemy.orm import joinedload, raiseload
+
+# Building the options configures the mappers, so every model must be registered
+from app.models import admin, preference, profile, user  # noqa: F401
+from app.models.engagement import Notification
+from app.models.interaction import Chat, Match, Message
+from app.models.security import UserReport
+
+# Loader options for the ORM objects that the nested response schemas are
+# serialized from. Each tuple eagerly loads exactly the relationships its
+# schema embeds. Those are all many-to-one, so joinedload fetches them in the
+# page's own SELECT without multiplying its rows. raiseload('*') makes any
+# relationship a schema starts to embed without updating its tuple fail
+# loudly instead of lazy loading once per row.
+
+# MatchWithUsers
+MATCH_WITH_USERS = (joinedload(Match.user1), joinedload(Match.user2), raiseload('*'))
+
+# ChatWithUsers
+CHAT_WITH_USERS = (
+    joinedload(Chat.initiator), joinedload(Chat.receiver), joinedload(Chat.match), raiseload('*')
+)
+
+# MessageWithUsers (the embedded chat is a flat ChatInDB)
+MESSAGE_WITH_USERS = (
+    joinedload(Message.sender), joinedload(Message.receiver), joinedload(Message.chat), raiseload('*')
+)
+
+# NotificationWithUser
+NOTIFICATION_WITH_USER = (joinedload(Notification.user), raiseload('*'))
+
+# UserReportWithUsers
+USER_REPORT_WITH_USERS = (joinedload(UserReport.reporter), joinedload(UserReport.reported), raiseload('*'))
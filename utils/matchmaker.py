@@ -1,16 +1,28 @@
+import logging
+
 import numpy as np
-import pandas as pd
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence
 from datetime import datetime
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.database import SessionLocal
 from app.models.engagement import Notification
-from app.models.interaction import Like, Match, Chat
+from app.models.interaction import Match, Chat
 from app.models.preference import Preference
 from app.models.profile import Profile
-from app.models.security import BlockedUser
 from app.models.user import User
 from app.schemas.engagement import RecommendationCreate
+from utils.bulk import dialect_insert
+from utils.candidates import candidate_query
+from utils.eligibility_index import get_eligibility_index
+from utils.like_graph import LikeGraph, get_like_graph
+from utils.profile_matrix import (
+    ProfileMatrix, PreferenceMatrix,
+    PROFILE_MATRIX_COLUMNS, PREFERENCE_MATRIX_COLUMNS
+)
+
+logger = logging.getLogger(__name__)
 
 
 class MatchMaker:
@@ -24,110 +36,60 @@ class MatchMaker:
         - Preferences
         - Interactions (likes, visits)
         """
-        score = 0.0
-
-        # Get profiles and preferences
-        profile1 = self.db.query(Profile).filter(Profile.user_id == user1.user_id).first()
-        profile2 = self.db.query(Profile).filter(Profile.user_id == user2.user_id).first()
-        pref1 = self.db.query(Preference).filter(Preference.user_id == user1.user_id).first()
-        pref2 = self.db.query(Preference).filter(Preference.user_id == user2.user_id).first()
-
-        if not profile1 or not profile2:
-            return 0.0
-
-        # 1. Check if users meet each other's basic preferences
-        if pref1 and pref2:
-            # Check age preferences
-            if profile2.date_of_birth:
-                age2 = self.calculate_age(profile2.date_of_birth)
-                if pref1.min_age and age2 < pref1.min_age:
-                    return 0.0
-                if pref1.max_age and age2 > pref1.max_age:
-                    return 0.0
-
-            if profile1.date_of_birth:
-                age1 = self.calculate_age(profile1.date_of_birth)
-                if pref2.min_age and age1 < pref2.min_age:
-                    return 0.0
-                if pref2.max_age and age1 > pref2.max_age:
-                    return 0.0
-
-            # Check height preferences
-            if profile2.height_cm:
-                if pref1.min_height_cm and profile2.height_cm < pref1.min_height_cm:
-                    return 0.0
-                if pref1.max_height_cm and profile2.height_cm > pref1.max_height_cm:
-                    return 0.0
-
-            if profile1.height_cm:
-                if pref2.min_height_cm and profile1.height_cm < pref2.min_height_cm:
-                    return 0.0
-                if pref2.max_height_cm and profile1.height_cm > pref2.max_height_cm:
-                    return 0.0
-
-            # Check religion and caste preferences
-            if pref1.preferred_religions_text and profile2.religion_text:
-                if profile2.religion_text not in pref1.preferred_religions_text.split(','):
-                    return 0.0
-
-            if pref2.preferred_religions_text and profile1.religion_text:
-                if profile1.religion_text not in pref2.preferred_religions_text.split(','):
-                    return 0.0
-
-            if pref1.preferred_castes_text and profile2.caste_text:
-                if profile2.caste_text not in pref1.preferred_castes_text.split(','):
-                    return 0.0
-
-            if pref2.preferred_castes_text and profile1.caste_text:
-                if profile1.caste_text not in pref2.preferred_castes_text.split(','):
-                    return 0.0
+        return float(self.score_many(user1.user_id, [user2.user_id])[0])
+
+    def score_many(self, user_id: int, candidate_ids: Sequence[int]) -> np.ndarray:
+        """
+        Compatibility scores of one user against many candidates, aligned with
+        `candidate_ids`. Profiles and preferences for the whole batch are loaded
+        in two queries; candidates without a profile score 0.
+        """
+        user_ids = list(dict.fromkeys([user_id, *candidate_ids]))
+
+        matrix = ProfileMatrix.from_query(
+            self.db.query(*PROFILE_MATRIX_COLUMNS).filter(Profile.user_id.in_(user_ids))
+        )
+        preferences = PreferenceMatrix(
+            self.db.query(*PREFERENCE_MATRIX_COLUMNS).filter(Preference.user_id.in_(user_ids)).all(),
+            matrix
+        )
+
+        # Unknown candidates (position -1) pick up the trailing 0
+        scores = np.append(self.score_matrix(user_id, matrix, preferences), 0.0)
+        return scores[matrix.positions(candidate_ids)]
+
+    def score_matrix(
+            self,
+            user_id: int,
+            matrix: ProfileMatrix,
+            preferences: PreferenceMatrix,
+            like_graph: Optional[LikeGraph] = None
+    ) -> np.ndarray:
+        """
+        Compatibility scores of `user_id` against every row of `matrix`.
+        Mutual likes come from `like_graph`, or the process-wide graph if not given.
+        """
+        row = matrix.position(user_id)
+        if row is None:
+            return np.zeros(len(matrix))
+
+        # 1. Check if users meet each other's basic preferences (only when both have preferences)
+        user_pref = preferences.get(user_id)
+        eligible = np.ones(len(matrix), dtype=bool)
+        if user_pref:
+            reciprocal = matrix.preference_mask(user_pref) & preferences.accepts(matrix, row)
+            eligible = ~preferences.has_preference | reciprocal
 
         # 2. Calculate score based on matching attributes
-        attribute_weights = {
-            'religion_text': 0.15,
-            'caste_text': 0.1,
-            'education_level_text': 0.1,
-            'profession_text': 0.1,
-            'city_text': 0.05,
-            'district_text': 0.05,
-            'hobbies_interests': 0.1,
-            'annual_salary_npr': 0.05,
-            'rashi': 0.1,
-            'nakshatra': 0.1,
-            'manglik_status': 0.1
-        }
-
-        for attr, weight in attribute_weights.items():
-            val1 = getattr(profile1, attr, None)
-            val2 = getattr(profile2, attr, None)
-
-            if val1 and val2:
-                if attr == 'hobbies_interests':
-                    # For hobbies, calculate Jaccard similarity
-                    hobbies1 = set(val1.split(','))
-                    hobbies2 = set(val2.split(','))
-                    intersection = len(hobbies1.intersection(hobbies2))
-                    union = len(hobbies1.union(hobbies2))
-                    if union > 0:
-                        similarity = intersection / union
-                        score += similarity * weight
-                else:
-                    if val1 == val2:
-                        score += weight
+        scores = matrix.similarity(row)
 
         # 3. Boost score if there are mutual likes
-        mutual_like = self.db.query(Like).filter(
-            ((Like.liker_user_id == user1.user_id) & (Like.liked_user_id == user2.user_id)) |
-            ((Like.liker_user_id == user2.user_id) & (Like.liked_user_id == user1.user_id))
-        ).count()
-
-        if mutual_like >= 2:
-            score += 0.3  # Significant boost for mutual likes
+        like_graph = like_graph or get_like_graph(self.db)
+        mutual = np.isin(matrix.user_ids, like_graph.mutual_likes(user_id))
+        scores = np.where(mutual, scores + 0.3, scores)  # Significant boost for mutual likes
 
         # Ensure score is between 0 and 1
-        score = min(max(score, 0.0), 1.0)
-
-        return score
+        return np.where(eligible, np.clip(scores, 0.0, 1.0), 0.0)
 
     def calculate_age(self, dob: datetime.date) -> int:
         today = datetime.today().date()
@@ -137,62 +99,89 @@ class MatchMaker:
         """
         Find potential matches for a user using hybrid filtering (content + collaborative)
         """
-        user = self.db.query(User).filter(User.user_id == user_id).first()
-        if not user:
+        user_profile = self.db.query(*PROFILE_MATRIX_COLUMNS).filter(Profile.user_id == user_id).first()
+        if not user_profile:
             return []
+        user_pref = self.db.query(*PREFERENCE_MATRIX_COLUMNS).filter(Preference.user_id == user_id).first()
+
+        # Load the user and every candidate passing both users' hard filters;
+        # blocked and already matched users are excluded in SQL
+        candidate_rows = candidate_query(
+            self.db, user_id, PROFILE_MATRIX_COLUMNS,
+            pref=user_pref,
+            profile=user_profile,
+            reciprocal=True,
+            exclude_matched=True,
+            user_ids=self.eligible_candidates(user_id)
+        )
+        matrix = ProfileMatrix.from_query(candidate_rows)
 
-        # Get all active users who are not blocked and not already matched
-        all_users = self.db.query(User).filter(
-            User.user_id != user_id,
-            User.account_status == 'active'
-        ).all()
+        row = matrix.position(user_id)
+        if row is None:
+            return []
 
-        # Calculate scores for each potential match
-        recommendations = []
-        for potential_match in all_users:
-            # Skip if already matched
-            existing_match = self.db.query(Match).filter(
-                ((Match.user1_id == user_id) & (Match.user2_id == potential_match.user_id)) |
-                ((Match.user1_id == potential_match.user_id) & (Match.user2_id == user_id))
-            ).first()
-
-            if existing_match:
-                continue
+        preferences = PreferenceMatrix(
+            self.db.query(*PREFERENCE_MATRIX_COLUMNS).filter(
+                Preference.user_id.in_(candidate_rows.with_entities(Profile.user_id).order_by(None))
+            ).all(),
+            matrix
+        )
 
-            # Skip if blocked
-            blocked = self.db.query(BlockedUser).filter(
-                ((BlockedUser.blocker_user_id == user_id) & (BlockedUser.blocked_user_id == potential_match.user_id)) |
-                ((BlockedUser.blocker_user_id == potential_match.user_id) & (BlockedUser.blocked_user_id == user_id))
-            ).first()
+        eligible = np.ones(len(matrix), dtype=bool)
+        eligible[row] = False
 
-            if blocked:
-                continue
+        # Calculate compatibility scores for all candidates at once
+        scores = self.score_matrix(user_id, matrix, preferences)
+        return self.rank_matches(user_id, matrix, scores, eligible, limit)
+
+    def eligible_candidates(self, user_id: int) -> Optional[List[int]]:
+        """
+        Users mutually eligible with `user_id` according to the eligibility
+        index, or None to filter every candidate in SQL (small population,
+        user not indexed yet, or the index would not narrow the scan)
+        """
+        if settings.ELIGIBILITY_MIN_POPULATION <= 0:
+            return None
 
-            # Calculate compatibility score
-            score = self.calculate_compatibility_score(user, potential_match)
+        index = get_eligibility_index(self.db, settings.ELIGIBILITY_INDEX_TTL_SECONDS)
+        if len(index) < settings.ELIGIBILITY_MIN_POPULATION:
+            return None
 
-            if score > 0.3:  # Only consider matches with at least 30% compatibility
-                recommendations.append(RecommendationCreate(
-                    user_id=user_id,
-                    recommended_user_id=potential_match.user_id,
-                    recommendation_score=score,
-                    reason=f"Compatibility score: {score:.0%}"
-                ))
+        candidate_ids = index.mutual_user_ids(user_id)
+        if candidate_ids is None or candidate_ids.size >= len(index) // 2:
+            return None
+        return candidate_ids.tolist()
+
+    @staticmethod
+    def rank_matches(
+            user_id: int,
+            matrix: ProfileMatrix,
+            scores: np.ndarray,
+            eligible: np.ndarray,
+            limit: int = 10
+    ) -> List[RecommendationCreate]:
+        """
+        Best `limit` eligible rows of `matrix` by compatibility score, as recommendations
+        """
+        # Only consider matches with at least 30% compatibility
+        candidates = np.flatnonzero(eligible & (scores > 0.3))
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')][:limit]
 
-        # Sort by score and limit results
-        recommendations.sort(key=lambda x: x.recommendation_score, reverse=True)
-        return recommendations[:limit]
+        recommendations = []
+        for i in ranked:
+            score = float(scores[i])
+            recommendations.append(RecommendationCreate(
+                user_id=user_id,
+                recommended_user_id=int(matrix.user_ids[i]),
+                recommendation_score=score,
+                reason=f"Compatibility score: {score:.0%}"
+            ))
+        return recommendations
 
     def create_match_if_compatible(self, user1_id: int, user2_id: int) -> Optional[Match]:
         """
         Check if two users are compatible and create a match if they are
         """
-        user1 = self.db.query(User).filter(User.user_id == user1_id).first()
-        user2 = self.db.query(User).filter(User.user_id == user2_id).first()
-
-        if not user1 or not user2:
-            return None
-
         # Check if already matched
         existing_match = self.db.query(Match).filter(
             ((Match.user1_id == user1_id) & (Match.user2_id == user2_id)) |
@@ -202,61 +191,101 @@ class MatchMaker:
         if existing_match:
             return existing_match
 
-        # Calculate compatibility score
-        score = self.calculate_compatibility_score(user1, user2)
-
-        # Create match if score is above threshold or there are mutual likes
-        if score >= 0.7:  # 70% compatibility threshold
-            # Check for mutual likes
-            mutual_likes = self.db.query(Like).filter(
-                ((Like.liker_user_id == user1_id) & (Like.liked_user_id == user2_id)) |
-                ((Like.liker_user_id == user2_id) & (Like.liked_user_id == user1_id))
-            ).count()
-
-            if mutual_likes >= 2 or score >= 0.8:
-                # Create new match
-                new_match = Match(
-                    user1_id=min(user1_id, user2_id),
-                    user2_id=max(user1_id, user2_id),
-                    compatibility_score=score,
-                    match_status='active'
-                )
-                self.db.add(new_match)
-                self.db.commit()
-                self.db.refresh(new_match)
-
-                # Create chat
-                new_chat = Chat(
-                    match_id=new_match.match_id,
-                    initiator_user_id=user1_id,
-                    receiver_user_id=user2_id
-                )
-                self.db.add(new_chat)
-                self.db.commit()
+        new_matches = self.create_matches_if_compatible(user1_id, [user2_id])
+        return new_matches[0] if new_matches else None
 
-                # Create notifications
-                self.create_match_notification(user1_id, user2_id, new_match.match_id)
-                self.create_match_notification(user2_id, user1_id, new_match.match_id)
+    def create_matches_if_compatible(self, user_id: int, candidate_ids: Sequence[int]) -> List[Match]:
+        """
+        Create a match between `user_id` and every compatible candidate not
+        already matched with them. Scores the whole batch at once and writes
+        matches, chats and notifications in one transaction; one multi-row
+        INSERT ... RETURNING assigns the match ids the notifications refer to.
+        Returns the new matches.
+        """
+        candidate_ids = [c for c in dict.fromkeys(candidate_ids) if c != user_id]
+        if not candidate_ids:
+            return []
 
-                return new_match
+        matched = self.db.query(Match.user1_id, Match.user2_id).filter(
+            ((Match.user1_id == user_id) & Match.user2_id.in_(candidate_ids)) |
+            ((Match.user2_id == user_id) & Match.user1_id.in_(candidate_ids))
+        ).all()
+        matched_ids = {user1_id if user2_id == user_id else user2_id for user1_id, user2_id in matched}
 
-        return None
+        # Calculate compatibility scores (0 when either user has no profile)
+        scores = self.score_many(user_id, candidate_ids)
+        like_graph = get_like_graph(self.db)
 
-    def create_match_notification(self, user_id: int, matched_user_id: int, match_id: int):
+        rows = []
+        for candidate_id, score in zip(candidate_ids, scores.tolist()):
+            # Create match if score is above threshold or there are mutual likes
+            if candidate_id in matched_ids or score < 0.7:  # 70% compatibility threshold
+                continue
+            if score >= 0.8 or like_graph.like_count_between(user_id, candidate_id) >= 2:
+                rows.append({
+                    'user1_id': min(user_id, candidate_id),
+                    'user2_id': max(user_id, candidate_id),
+                    'compatibility_score': score,
+                    'match_status': 'active'
+                })
+        if not rows:
+            return []
+
+        # The like task of the other user may have matched a pair since the check
+        # above; uq_matches_user1_user2 turns that insert into a no-op, and only
+        # the matches inserted here get a chat and notifications
+        new_matches = self.db.scalars(
+            dialect_insert(self.db, Match).values(rows).on_conflict_do_nothing().returning(Match)
+        ).all()
+        if new_matches:
+            self.db.add_all([
+                Chat(
+                    match=match,
+                    initiator_user_id=user_id,
+                    receiver_user_id=match.user2_id if match.user1_id == user_id else match.user1_id
+                )
+                for match in new_matches
+            ])
+            self.db.add_all(self.match_notifications(new_matches))
+        self.db.commit()
+        return new_matches
+
+    def match_notifications(self, matches: Sequence[Match]) -> List[Notification]:
         """
-        Create a notification for a new match
+        "New match" notifications for both users of each match, naming the
+        other one. Users matched with someone without a profile get no notification.
         """
-        matched_user = self.db.query(User).join(Profile).filter(User.user_id == matched_user_id).first()
-        if not matched_user or not matched_user.profile:
-            return
-
-        notification = Notification(
-            user_id=user_id,
-            notification_type='new_match',
-            title="New Match!",
-            message_body=f"You have a new match with {matched_user.profile.first_name}!",
-            related_entity_type='match',
-            related_entity_id=match_id
-        )
-        self.db.add(notification)
-        self.db.commit()
\ No newline at end of file
+        user_ids = {user_id for match in matches for user_id in (match.user1_id, match.user2_id)}
+        first_names = dict(self.db.query(Profile.user_id, Profile.first_name).filter(
+            Profile.user_id.in_(user_ids)
+        ).all())
+
+        return [
+            Notification(
+                user_id=user_id,
+                notification_type='new_match',
+                title="New Match!",
+                message_body=f"You have a new match with {first_names[matched_user_id]}!",
+                related_entity_type='match',
+                related_entity_id=match.match_id
+            )
+            for match in matches
+            for user_id, matched_user_id in ((match.user1_id, match.user2_id), (match.user2_id, match.user1_id))
+            if matched_user_id in first_names
+        ]
+
+
+def create_matches_in_background(user_id: int, candidate_ids: Sequence[int]):
+    """
+    Post-response stage of a like (or a batch of likes): check compatibility
+    and create matches with its own session, since the request's session is
+    closed by then
+    """
+    db = SessionLocal()
+    try:
+        MatchMaker(db).create_matches_if_compatible(user_id, candidate_ids)
+    except Exception:
+        db.rollback()
+        logger.exception("Match creation failed for user %s and candidates %s", user_id, list(candidate_ids))
+    finally:
+        db.close()
@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.sql import ColumnElement, Select
+
+from utils.cursors import decode_cursor, encode_cursor
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREVIOUS_CURSOR_HEADER = "X-Prev-Cursor"
+
+
+def keyset_cursor(timestamp: datetime, row_id: int) -> str:
+    return encode_cursor({'t': timestamp.isoformat(), 'id': row_id})
+
+
+def parse_keyset_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    (timestamp, id) of a cursor made by keyset_cursor; raises ValueError if it is malformed
+    """
+    payload = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(payload['t']), int(payload['id'])
+    except (KeyError, TypeError) as exc:
+        raise ValueError("Malformed cursor") from exc
+
+
+def paginate(
+        statement: Select,
+        timestamp_column: ColumnElement,
+        id_column: ColumnElement,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0
+) -> Select:
+    """
+    One page of `statement`, newest first by (timestamp, id).
+
+    `before` selects the rows older than a cursor (the following page),
+    `after` the rows newer than it (read oldest first, see page_rows), both
+    as an index range scan on (..., timestamp, id). Without a cursor the
+    deprecated `offset` is applied. Raises ValueError for a malformed cursor
+    or both cursors at once.
+    """
+    if before and after:
+        raise ValueError("Pass either before or after, not both")
+
+    key = tuple_(timestamp_column, id_column)
+    if after:
+        return statement.where(key > tuple_(*parse_keyset_cursor(after))).order_by(
+            timestamp_column.asc(), id_column.asc()
+        ).limit(limit)
+
+    statement = statement.order_by(timestamp_column.desc(), id_column.desc())
+    if before:
+        statement = statement.where(key < tuple_(*parse_keyset_cursor(before)))
+    elif offset:
+        statement = statement.offset(offset)
+    return statement.limit(limit)
+
+
+def page_rows(rows: Sequence[Any], after: Optional[str] = None) -> List[Any]:
+    """
+    Rows of a page fetched with paginate(), newest first
+    """
+    return list(reversed(rows)) if after else list(rows)
+
+
+def page_headers(rows: Sequence[Any], timestamp_attr: str, id_attr: str, limit: int) -> Dict[str, str]:
+    """
+    Cursor headers of a newest-first page: X-Next-Cursor (pass as `before`)
+    when the page is full, X-Prev-Cursor (pass as `after`, e.g. to poll for
+    new rows) when it is not empty
+    """
+    headers = {}
+    if rows:
+        first = rows[0]
+        headers[PREVIOUS_CURSOR_HEADER] = keyset_cursor(getattr(first, timestamp_attr), getattr(first, id_attr))
+    if rows and len(rows) >= limit:
+        last = rows[-1]
+        headers[NEXT_CURSOR_HEADER] = keyset_cursor(getattr(last, timestamp_attr), getattr(last, id_attr))
+    return headers
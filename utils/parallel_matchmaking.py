@@ -0,0 +1,241 @@
+import argparse
+import io
+import logging
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.interaction import Match
+from app.models.preference import Preference
+from app.models.profile import Profile
+from app.models.security import BlockedUser
+from app.models.user import User
+from app.schemas.engagement import RecommendationCreate
+from utils.like_graph import get_like_graph
+from utils.matchmaker import MatchMaker
+from utils.profile_matrix import (
+    ProfileMatrix, PreferenceMatrix,
+    PROFILE_MATRIX_COLUMNS, PREFERENCE_MATRIX_COLUMNS
+)
+from utils.recommendation_store import MATCHMAKER_SOURCE, store_recommendations
+
+logger = logging.getLogger(__name__)
+
+# Arrays in the shared block start on cache-line boundaries
+_ALIGNMENT = 64
+
+
+class _SharingPickler(pickle.Pickler):
+    """
+    Pickler that leaves NumPy arrays out of the payload and records where
+    each one goes in a shared memory block instead
+    """
+
+    def __init__(self, file):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.arrays: List[Tuple[int, np.ndarray]] = []
+        self.offsets: Dict[int, int] = {}
+        self.size = 0
+
+    def persistent_id(self, obj):
+        if type(obj) is not np.ndarray or obj.dtype.hasobject:
+            return None
+        offset = self.offsets.get(id(obj))
+        if offset is None:
+            offset = -(-self.size // _ALIGNMENT) * _ALIGNMENT
+            self.offsets[id(obj)] = offset
+            self.arrays.append((offset, obj))
+            self.size = offset + obj.nbytes
+        return ('ndarray', offset, obj.shape, obj.dtype.str)
+
+
+class _SharedUnpickler(pickle.Unpickler):
+    """
+    Unpickler that maps the arrays recorded by _SharingPickler onto read-only
+    views of the shared memory block
+    """
+
+    def __init__(self, file, buffer):
+        super().__init__(file)
+        self.buffer = buffer
+
+    def persistent_load(self, pid):
+        _, offset, shape, dtype = pid
+        array = np.ndarray(shape, dtype=dtype, buffer=self.buffer, offset=offset)
+        array.flags.writeable = False
+        return array
+
+
+def share(state) -> Tuple[shared_memory.SharedMemory, bytes]:
+    """
+    Move every array reachable from `state` into one shared memory block.
+    Returns the block and a small pickle that attach() turns back into `state`.
+    The caller owns the block and must close and unlink it.
+    """
+    payload = io.BytesIO()
+    pickler = _SharingPickler(payload)
+    pickler.dump(state)
+
+    block = shared_memory.SharedMemory(create=True, size=max(pickler.size, 1))
+    for offset, array in pickler.arrays:
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf, offset=offset)[...] = array
+    return block, payload.getvalue()
+
+
+def attach(block: shared_memory.SharedMemory, payload: bytes):
+    return _SharedUnpickler(io.BytesIO(payload), block.buf).load()
+
+
+def load_state(db: Session):
+    """
+    Everything workers need to match any active user without touching the
+    database: profiles, preferences, the like graph, and a symmetric
+    row x row matrix of pairs that must not be matched (blocked or already matched)
+    """
+    matrix = ProfileMatrix.from_query(
+        db.query(*PROFILE_MATRIX_COLUMNS)
+        .join(User, User.user_id == Profile.user_id)
+        .filter(User.account_status == 'active')
+        .order_by(Profile.user_id)
+    )
+    preferences = PreferenceMatrix(
+        db.query(*PREFERENCE_MATRIX_COLUMNS)
+        .join(User, User.user_id == Preference.user_id)
+        .filter(User.account_status == 'active')
+        .all(),
+        matrix
+    )
+
+    pairs = np.asarray(
+        db.query(BlockedUser.blocker_user_id, BlockedUser.blocked_user_id).all()
+        + db.query(Match.user1_id, Match.user2_id).all(),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    rows, cols = matrix.positions(pairs[:, 0]), matrix.positions(pairs[:, 1])
+    known = (rows >= 0) & (cols >= 0)
+    rows, cols = rows[known], cols[known]
+    n = len(matrix)
+    excluded = sparse.csr_matrix(
+        (np.ones(2 * rows.size, dtype=np.int8), (np.concatenate((rows, cols)), np.concatenate((cols, rows)))),
+        shape=(n, n)
+    )
+
+    return matrix, preferences, excluded, get_like_graph(db)
+
+
+_block: Optional[shared_memory.SharedMemory] = None
+_state = None
+
+
+def _init_worker(block_name: str, payload: bytes):
+    global _block, _state
+    _block = shared_memory.SharedMemory(name=block_name)
+    _state = attach(_block, payload)
+
+
+def _match_shard(user_ids: List[int], limit: int) -> Dict[int, List[RecommendationCreate]]:
+    matrix, preferences, excluded, like_graph = _state
+    # Scoring only needs the shared state, so the matchmaker runs without a session
+    matchmaker = MatchMaker(None)
+
+    results = {}
+    for user_id in user_ids:
+        row = matrix.position(user_id)
+        if row is None:
+            results[user_id] = []
+            continue
+
+        eligible = np.ones(len(matrix), dtype=bool)
+        eligible[row] = False
+        eligible[excluded.indices[excluded.indptr[row]:excluded.indptr[row + 1]]] = False
+
+        scores = matchmaker.score_matrix(user_id, matrix, preferences, like_graph)
+        results[user_id] = matchmaker.rank_matches(user_id, matrix, scores, eligible, limit)
+    return results
+
+
+def run_parallel_matchmaking(
+        db: Session,
+        workers: Optional[int] = None,
+        shard_size: int = 200,
+        limit: int = 50,
+        user_ids: Optional[List[int]] = None
+) -> int:
+    """
+    Find potential matches for every active user (or `user_ids`) across a
+    process pool and store them as recommendations of MATCHMAKER_SOURCE,
+    next to (not replacing) the hybrid rows /recommendations serves.
+
+    The read-only state is loaded once and placed in shared memory, so workers
+    map it instead of receiving a pickled copy. Shards of `shard_size` users
+    are scored in parallel and each finished shard is stored and committed as
+    it arrives. Returns the number of users processed.
+    """
+    started = time.perf_counter()
+    state = load_state(db)
+    matrix = state[0]
+    if user_ids is None:
+        user_ids = matrix.user_ids.tolist()
+    total = len(user_ids)
+    logger.info("Loaded %d profiles in %.1fs", len(matrix), time.perf_counter() - started)
+
+    block, payload = share(state)
+    del state
+    logger.info("Shared %.1f MiB of matching state", block.size / 2 ** 20)
+
+    processed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(block.name, payload)) as pool:
+            futures = [
+                pool.submit(_match_shard, user_ids[start:start + shard_size], limit)
+                for start in range(0, total, shard_size)
+            ]
+            for future in as_completed(futures):
+                results = future.result()
+                store_recommendations(db, results, MATCHMAKER_SOURCE)
+                db.commit()
+
+                processed += len(results)
+                elapsed = time.perf_counter() - started
+                rate = processed / elapsed if elapsed else 0.0
+                logger.info(
+                    "Matched %d/%d users (%.0f users/s, ~%.0fs left)",
+                    processed, total, rate, (total - processed) / rate if rate else 0.0
+                )
+    finally:
+        block.close()
+        block.unlink()
+
+    return processed
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Find potential matches for all active users in parallel")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--shard-size", type=int, default=200, help="users per worker task")
+    parser.add_argument("--limit", type=int, default=50, help="matches stored per user")
+    parser.add_argument("--user-id", type=int, action="append", dest="user_ids",
+                        help="only match these users (repeatable)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    db = SessionLocal()
+    try:
+        processed = run_parallel_matchmaking(db, args.workers, args.shard_size, args.limit, args.user_ids)
+    finally:
+        db.close()
+    logger.info("Done: %d users", processed)
+
+
+if __name__ == "__main__":
+    main()
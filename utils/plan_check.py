@@ -0,0 +1,154 @@
+import argparse
+import json
+import logging
+import sys
+from typing import Dict, List, Optional, Sequence, Set
+
+from sqlalchemy import and_, create_engine, or_, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import Select
+
+from app.models import admin, preference, profile, user  # noqa: F401  (resolve the relationships)
+from app.models.engagement import Notification
+from app.models.interaction import Chat, Like, Match, Message
+from app.models.security import BlockedUser
+
+logger = logging.getLogger(__name__)
+
+# Node types of PostgreSQL plans that read through an index
+INDEX_SCANS = {'Index Scan', 'Index Only Scan', 'Bitmap Index Scan'}
+
+
+def hot_queries(user_id: int = 1, other_user_id: int = 2, chat_id: int = 1) -> Dict[str, tuple]:
+    """
+    The lookups the routers run on every request, as name -> (statement,
+    indexes the plan must use)
+    """
+    return {
+        'like_exists': (
+            select(Like.like_id).where(Like.liker_user_id == user_id, Like.liked_user_id == other_user_id),
+            {'uq_likes_liker_liked'}
+        ),
+        'likes_received': (
+            select(Like.liker_user_id).where(Like.liked_user_id == user_id),
+            {'ix_likes_liked_liker'}
+        ),
+        'likes_sent_page': (
+            select(Like.like_id).where(Like.liker_user_id == user_id).order_by(
+                Like.created_at.desc(), Like.like_id.desc()
+            ).limit(10),
+            {'ix_likes_liker_created_id'}
+        ),
+        'blocked_between': (
+            select(BlockedUser.block_id).where(or_(
+                and_(BlockedUser.blocker_user_id == user_id, BlockedUser.blocked_user_id == other_user_id),
+                and_(BlockedUser.blocker_user_id == other_user_id, BlockedUser.blocked_user_id == user_id)
+            )),
+            {'uq_blocked_users_blocker_blocked'}
+        ),
+        'blocked_by': (
+            select(BlockedUser.blocker_user_id).where(BlockedUser.blocked_user_id == user_id),
+            {'ix_blocked_users_blocked_blocker'}
+        ),
+        'matches_of_user': (
+            select(Match.match_id).where(or_(Match.user1_id == user_id, Match.user2_id == user_id)),
+            {'uq_matches_user1_user2', 'ix_matches_user2_user1'}
+        ),
+        'chat_messages': (
+            select(Message.message_id).where(Message.chat_id == chat_id).order_by(
+                Message.sent_at.desc(), Message.message_id.desc()
+            ).limit(100),
+            {'ix_messages_chat_sent_id'}
+        ),
+        'notifications_of_user': (
+            select(Notification.notification_id).where(
+                Notification.user_id == user_id
+            ).order_by(Notification.created_at.desc(), Notification.notification_id.desc()).limit(10),
+            {'ix_notifications_user_created_id'}
+        ),
+        'chats_of_user': (
+            select(Chat.chat_id).where(or_(Chat.initiator_user_id == user_id, Chat.receiver_user_id == user_id)),
+            {'ix_chats_initiator_created_id', 'ix_chats_receiver_created_id'}
+        ),
+    }
+
+
+def _postgresql_indexes(plan: dict) -> Set[str]:
+    indexes = set()
+    if plan.get('Node Type') in INDEX_SCANS and 'Index Name' in plan:
+        indexes.add(plan['Index Name'])
+    for child in plan.get('Plans', []):
+        indexes |= _postgresql_indexes(child)
+    return indexes
+
+
+def plan_indexes(connection: Connection, statement: Select) -> Set[str]:
+    """
+    Names of the indexes scanned by the plan of `statement`
+    """
+    dialect = connection.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    if dialect.name == 'postgresql':
+        plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return _postgresql_indexes(plan[0]['Plan'])
+    if dialect.name == 'sqlite':
+        # Detail lines look like "SEARCH likes USING COVERING INDEX uq_likes_liker_liked (...)"
+        details = [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+        return {
+            detail.split(' INDEX ', 1)[1].split()[0]
+            for detail in details if ' INDEX ' in detail
+        }
+    raise ValueError(f"Plan check does not support {dialect.name}")
+
+
+def check_plans(engine: Engine, disable_seqscan: bool = True) -> List[Dict]:
+    """
+    EXPLAIN every hot query and report whether its plan scans the expected
+    indexes. With `disable_seqscan`, PostgreSQL is told to avoid sequential
+    scans, so small tables (where a scan is cheaper) still show whether the
+    index is usable.
+    """
+    results = []
+    with engine.connect() as connection:
+        if disable_seqscan and connection.dialect.name == 'postgresql':
+            connection.execute(text("SET enable_seqscan = off"))
+        for name, (statement, expected) in hot_queries().items():
+            used = plan_indexes(connection, statement)
+            results.append({
+                'query': name,
+                'expected': sorted(expected),
+                'used': sorted(used),
+                'ok': expected <= used,
+            })
+        connection.rollback()
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Check that the hot lookup queries are planned as index scans")
+    parser.add_argument("--database-url", help="database to check (default: DATABASE_URL)")
+    parser.add_argument("--allow-seqscan", action="store_true",
+                        help="let PostgreSQL pick sequential scans (meaningful on production-sized tables only)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        from app.database import engine
+
+    results = check_plans(engine, disable_seqscan=not args.allow_seqscan)
+    for result in results:
+        log = logger.info if result['ok'] else logger.error
+        log("%-24s %s (expected %s, used %s)", result['query'], "ok" if result['ok'] else "MISSING INDEX",
+            ", ".join(result['expected']), ", ".join(result['used']) or "none")
+
+    if not all(result['ok'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
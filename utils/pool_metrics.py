@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolMetrics:
+    """
+    Checkout counters of one connection pool: how many checkouts, how long
+    they waited for a connection (including pre-ping and opening overflow
+    connections) and how many gave up after the pool timeout
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, wait_seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+
+class TimedPoolMixin:
+    """
+    Records the time spent in connect() (the checkout) in `self.metrics`,
+    which survives the pool being recreated on dispose() or invalidation
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.observe(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(pool: Pool) -> Dict[str, Optional[float]]:
+    """
+    Occupancy of a queue pool plus its checkout metrics when it is timed.
+    Saturation is the share of the pool's capacity (size plus max overflow)
+    currently checked out.
+    """
+    stats: Dict[str, Optional[float]] = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        stats.update({
+            'size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'checked_in': pool.checkedin(),
+            'checked_out': checked_out,
+            'overflow': pool.overflow(),
+            'saturation': checked_out / capacity if capacity else None,
+        })
+
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        stats.update({
+            'checkouts': metrics.checkouts,
+            'timeouts': metrics.timeouts,
+            'wait_seconds_total': metrics.wait_seconds_total,
+            'wait_seconds_mean': metrics.wait_seconds_total / metrics.checkouts if metrics.checkouts else None,
+            'wait_seconds_max': metrics.wait_seconds_max,
+        })
+    return stats
+
+
+def engine_pool_stats(engine: Engine) -> Dict[str, Optional[float]]:
+    return pool_stats(engine.pool)
@@ -0,0 +1,88 @@
+import argparse
+import logging
+import time
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.profile import Profile
+from app.models.user import User
+from utils.recommendation_store import store_recommendations
+from utils.recommender import Recommender
+
+logger = logging.getLogger(__name__)
+
+
+def active_user_ids(db: Session, after_user_id: int, limit: int) -> List[int]:
+    """
+    Next chunk of active users with a profile, in user id order
+    """
+    rows = db.query(User.user_id).join(Profile, Profile.user_id == User.user_id).filter(
+        User.account_status == 'active',
+        User.user_id > after_user_id
+    ).order_by(User.user_id).limit(limit).all()
+    return [row[0] for row in rows]
+
+
+def precompute_recommendations(
+        db: Session,
+        chunk_size: int = 500,
+        top_n: int = 50,
+        user_ids: Optional[List[int]] = None
+) -> int:
+    """
+    Recompute hybrid recommendations and store the top N per user, committing
+    once per chunk. Processes `user_ids` if given, otherwise every active user.
+    Returns the number of users processed.
+    """
+    recommender = Recommender(db)
+    processed = 0
+    last_user_id = 0
+
+    while True:
+        if user_ids is None:
+            chunk = active_user_ids(db, last_user_id, chunk_size)
+        else:
+            chunk = user_ids[processed:processed + chunk_size]
+        if not chunk:
+            break
+
+        started = time.perf_counter()
+        recommendations = {
+            user_id: recommender.hybrid_recommendation(user_id, top_n, exclude_recommended=False)
+            for user_id in chunk
+        }
+        inserted, updated, deleted = store_recommendations(db, recommendations)
+        db.commit()
+
+        processed += len(chunk)
+        last_user_id = chunk[-1]
+        logger.info(
+            "Stored recommendations for %d users (%d inserted, %d updated, %d deleted) in %.1fs",
+            processed, inserted, updated, deleted, time.perf_counter() - started
+        )
+
+    return processed
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Precompute recommendations for all active users")
+    parser.add_argument("--chunk-size", type=int, default=500, help="users per transaction")
+    parser.add_argument("--top-n", type=int, default=50, help="recommendations stored per user")
+    parser.add_argument("--user-id", type=int, action="append", dest="user_ids",
+                        help="only recompute these users (repeatable)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    db = SessionLocal()
+    try:
+        processed = precompute_recommendations(db, args.chunk_size, args.top_n, args.user_ids)
+    finally:
+        db.close()
+    logger.info("Done: %d users", processed)
+
+
+if __name__ == "__main__":
+    main()
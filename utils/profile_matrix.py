@@ -0,0 +1,274 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.models.preference import Preference
+from app.models.profile import Profile
+from utils.hobbies import HobbyIndex
+
+
+# Attribute weights shared by the recommender and the matchmaker. The order
+# matters: scores are accumulated in this order so vectorized results are
+# bit-for-bit identical to the per-pair implementation.
+ATTRIBUTE_WEIGHTS = {
+    'religion_text': 0.15,
+    'caste_text': 0.1,
+    'education_level_text': 0.1,
+    'profession_text': 0.1,
+    'city_text': 0.05,
+    'district_text': 0.05,
+    'hobbies_interests': 0.1,
+    'annual_salary_npr': 0.05,
+    'rashi': 0.1,
+    'nakshatra': 0.1,
+    'manglik_status': 0.1
+}
+
+CATEGORICAL_ATTRIBUTES = [
+    'religion_text', 'caste_text', 'education_level_text', 'profession_text',
+    'city_text', 'district_text', 'rashi', 'nakshatra', 'manglik_status'
+]
+
+# Columns needed to build a ProfileMatrix, for use in db.query(*PROFILE_MATRIX_COLUMNS)
+PROFILE_MATRIX_COLUMNS = [
+    Profile.user_id,
+    Profile.date_of_birth,
+    Profile.height_cm,
+    Profile.annual_salary_npr,
+    Profile.hobbies_interests,
+] + [getattr(Profile, attr) for attr in CATEGORICAL_ATTRIBUTES]
+
+
+def date_key(value: Optional[date]) -> int:
+    """
+    Encode a date as a yyyymmdd integer (0 when missing). Keys sort like dates
+    and (today_key - dob_key) // 10000 is the age in completed years.
+    """
+    if not value:
+        return 0
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def split_preference_list(text: Optional[str]) -> List[str]:
+    return text.split(',') if text else []
+
+
+class ProfileMatrix:
+    """
+    Columnar in-memory view of profiles used for vectorized scoring.
+
+    Categorical attributes are integer-coded (0 means missing), dates are
+    yyyymmdd keys, and hobbies are normalized into a bitset HobbyIndex, so one
+    user can be scored against every row in a single pass.
+    """
+
+    def __init__(self, rows: Iterable):
+        rows = list(rows)
+        n = len(rows)
+
+        self.user_ids = np.fromiter((row.user_id for row in rows), dtype=np.int64, count=n)
+        self.birth_keys = np.fromiter((date_key(row.date_of_birth) for row in rows), dtype=np.int64, count=n)
+        self.heights = np.fromiter((row.height_cm or 0 for row in rows), dtype=np.int64, count=n)
+
+        self.vocabularies: Dict[str, Dict[str, int]] = {}
+        self.columns: Dict[str, np.ndarray] = {}
+        for attr in CATEGORICAL_ATTRIBUTES:
+            vocabulary: Dict[str, int] = {}
+            self.vocabularies[attr] = vocabulary
+            self.columns[attr] = np.fromiter(
+                (self._encode(vocabulary, getattr(row, attr)) for row in rows),
+                dtype=np.int32, count=n
+            )
+        self.columns['annual_salary_npr'] = np.fromiter(
+            (row.annual_salary_npr or 0 for row in rows), dtype=np.int64, count=n
+        )
+
+        self.hobbies = HobbyIndex(row.hobbies_interests for row in rows)
+
+        self._positions = {int(user_id): i for i, user_id in enumerate(self.user_ids)}
+
+    def __getstate__(self):
+        # Positions are derived from user_ids; rebuilding them is cheaper than pickling
+        state = self.__dict__.copy()
+        del state['_positions']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._positions = {int(user_id): i for i, user_id in enumerate(self.user_ids)}
+
+    @staticmethod
+    def _encode(vocabulary: Dict[str, int], value: Optional[str]) -> int:
+        if not value:
+            return 0
+        code = vocabulary.get(value)
+        if code is None:
+            code = len(vocabulary) + 1
+            vocabulary[value] = code
+        return code
+
+    @classmethod
+    def from_query(cls, query) -> "ProfileMatrix":
+        return cls(query.all())
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def position(self, user_id: int) -> Optional[int]:
+        return self._positions.get(user_id)
+
+    def positions(self, user_ids: Iterable[int]) -> np.ndarray:
+        """
+        Row of each user id, -1 for users not in the matrix
+        """
+        return np.asarray([self._positions.get(user_id, -1) for user_id in user_ids], dtype=np.int64)
+
+    def codes_for(self, attr: str, values: Sequence[str]) -> np.ndarray:
+        """
+        Codes of the given values in an attribute's vocabulary; unknown values are dropped
+        """
+        vocabulary = self.vocabularies[attr]
+        return np.asarray([vocabulary[value] for value in values if value in vocabulary], dtype=np.int32)
+
+    def similarity(self, row: int) -> np.ndarray:
+        """
+        Weighted attribute similarity of `row` against every row, unclipped
+        """
+        scores = np.zeros(len(self))
+        for attr, weight in ATTRIBUTE_WEIGHTS.items():
+            if attr == 'hobbies_interests':
+                scores += self.hobbies.jaccard(row) * weight
+                continue
+
+            column = self.columns[attr]
+            value = column[row]
+            if value:
+                scores += np.where(column == value, weight, 0.0)
+        return scores
+
+    def ages(self, today: Optional[date] = None) -> np.ndarray:
+        today_key = date_key(today or date.today())
+        return (today_key - self.birth_keys) // 10000
+
+    def preference_mask(self, pref: Optional[Preference], today: Optional[date] = None) -> np.ndarray:
+        """
+        Rows satisfying the hard filters (age, height, religion, caste) of `pref`.
+        Missing profile values never fail a filter.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if not pref:
+            return mask
+
+        has_dob = self.birth_keys > 0
+        if pref.min_age or pref.max_age:
+            ages = self.ages(today)
+            if pref.min_age:
+                mask &= ~has_dob | (ages >= pref.min_age)
+            if pref.max_age:
+                mask &= ~has_dob | (ages <= pref.max_age)
+
+        has_height = self.heights > 0
+        if pref.min_height_cm:
+            mask &= ~has_height | (self.heights >= pref.min_height_cm)
+        if pref.max_height_cm:
+            mask &= ~has_height | (self.heights <= pref.max_height_cm)
+
+        for attr, text in (('religion_text', pref.preferred_religions_text),
+                           ('caste_text', pref.preferred_castes_text)):
+            if text:
+                column = self.columns[attr]
+                mask &= (column == 0) | np.isin(column, self.codes_for(attr, split_preference_list(text)))
+
+        return mask
+
+
+# Columns needed to build a PreferenceMatrix, for use in db.query(*PREFERENCE_MATRIX_COLUMNS)
+PREFERENCE_MATRIX_COLUMNS = [
+    Preference.user_id,
+    Preference.min_age,
+    Preference.max_age,
+    Preference.min_height_cm,
+    Preference.max_height_cm,
+    Preference.preferred_religions_text,
+    Preference.preferred_castes_text,
+]
+
+
+class PreferenceMatrix:
+    """
+    Hard-filter preferences aligned with the rows of a ProfileMatrix, used to
+    answer "which rows would accept this profile" in one vectorized pass.
+
+    Bounds use 0 for "not set". Preferred religion/caste lists are stored as
+    flat (row, code) pairs coded with the profile matrix vocabularies; values
+    unknown to the vocabulary are kept as -1 so the list still counts as set.
+    """
+
+    def __init__(self, preferences: Iterable, matrix: ProfileMatrix):
+        n = len(matrix)
+        self.by_user = {}
+        self.has_preference = np.zeros(n, dtype=bool)
+        self.min_age = np.zeros(n, dtype=np.int64)
+        self.max_age = np.zeros(n, dtype=np.int64)
+        self.min_height = np.zeros(n, dtype=np.int64)
+        self.max_height = np.zeros(n, dtype=np.int64)
+
+        lists = {'religion_text': ([], [], np.zeros(n, dtype=bool)),
+                 'caste_text': ([], [], np.zeros(n, dtype=bool))}
+
+        for pref in preferences:
+            row = matrix.position(pref.user_id)
+            if row is None:
+                continue
+            self.by_user[pref.user_id] = pref
+            self.has_preference[row] = True
+            self.min_age[row] = pref.min_age or 0
+            self.max_age[row] = pref.max_age or 0
+            self.min_height[row] = pref.min_height_cm or 0
+            self.max_height[row] = pref.max_height_cm or 0
+
+            for attr, text in (('religion_text', pref.preferred_religions_text),
+                               ('caste_text', pref.preferred_castes_text)):
+                if text:
+                    rows, codes, has_list = lists[attr]
+                    vocabulary = matrix.vocabularies[attr]
+                    values = split_preference_list(text)
+                    rows.extend([row] * len(values))
+                    codes.extend(vocabulary.get(value, -1) for value in values)
+                    has_list[row] = True
+
+        self.list_rows = {attr: np.asarray(rows, dtype=np.int64) for attr, (rows, _, _) in lists.items()}
+        self.list_codes = {attr: np.asarray(codes, dtype=np.int32) for attr, (_, codes, _) in lists.items()}
+        self.has_list = {attr: has_list for attr, (_, _, has_list) in lists.items()}
+
+    def get(self, user_id: int) -> Optional[Preference]:
+        return self.by_user.get(user_id)
+
+    def accepts(self, matrix: ProfileMatrix, row: int, today: Optional[date] = None) -> np.ndarray:
+        """
+        Rows whose preferences accept the profile at `row`. Rows without
+        preferences accept everyone; missing profile values never fail a filter.
+        """
+        n = len(matrix)
+        mask = np.ones(n, dtype=bool)
+
+        birth_key = matrix.birth_keys[row]
+        if birth_key:
+            age = (date_key(today or date.today()) - birth_key) // 10000
+            mask &= (self.min_age == 0) | (age >= self.min_age)
+            mask &= (self.max_age == 0) | (age <= self.max_age)
+
+        height = matrix.heights[row]
+        if height:
+            mask &= (self.min_height == 0) | (height >= self.min_height)
+            mask &= (self.max_height == 0) | (height <= self.max_height)
+
+        for attr in ('religion_text', 'caste_text'):
+            value = matrix.columns[attr][row]
+            if value:
+                hits = self.list_rows[attr][self.list_codes[attr] == value]
+                listed = np.bincount(hits, minlength=n) > 0
+                mask &= ~self.has_list[attr] | listed
+
+        return mask
@@ -0,0 +1,134 @@
+import argparse
+import logging
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.api.admin import reports_query
+from app.api.chats import user_chats_query
+from app.api.matches import user_matches_query
+from app.api.messages import chat_messages_query
+from app.api.notifications import user_notifications_query
+from app.models.engagement import Notification
+from app.models.interaction import Chat, Match, Message
+from app.schemas.engagement import NotificationWithUser
+from app.schemas.interaction import ChatWithUsers, MatchWithUsers, MessageWithUsers
+from app.schemas.security import UserReportWithUsers
+from utils.benchmark_matching import QueryCounter
+from utils.pagination import paginate
+
+logger = logging.getLogger(__name__)
+
+
+def busiest(db: Session, column):
+    """
+    Value of `column` shared by the most rows, i.e. the owner with the fullest pages
+    """
+    return db.execute(select(column).group_by(column).order_by(func.count().desc()).limit(1)).scalar()
+
+
+def response_pages(db: Session) -> Dict[str, tuple]:
+    """
+    The list endpoints with nested response schemas, each paged by the
+    router's own query builder for its busiest owner, as name -> (page
+    statement for a limit, response schema, statements a page may take
+    whatever its size)
+    """
+    user_id = busiest(db, Match.user1_id)
+    chat_user_id = busiest(db, Chat.initiator_user_id)
+    chat_id = busiest(db, Message.chat_id)
+    notified_user_id = busiest(db, Notification.user_id)
+    return {
+        'matches': (
+            lambda limit: paginate(user_matches_query(user_id), Match.created_at, Match.match_id, limit=limit),
+            MatchWithUsers, 1
+        ),
+        'chats': (
+            lambda limit: paginate(user_chats_query(chat_user_id), Chat.created_at, Chat.chat_id, limit=limit),
+            ChatWithUsers, 1
+        ),
+        'chat_messages': (
+            lambda limit: paginate(chat_messages_query(chat_id), Message.sent_at, Message.message_id, limit=limit),
+            MessageWithUsers, 1
+        ),
+        'notifications': (
+            lambda limit: paginate(
+                user_notifications_query(notified_user_id), Notification.created_at, Notification.notification_id,
+                limit=limit
+            ),
+            NotificationWithUser, 1
+        ),
+        'admin_reports': (lambda limit: reports_query().limit(limit), UserReportWithUsers, 1),
+    }
+
+
+def count_page_queries(engine: Engine, db: Session, statement, schema) -> Tuple[int, int]:
+    """
+    Statements needed to load a page and serialize it as `schema`, the way
+    a list endpoint does, and the number of rows on the page
+    """
+    with QueryCounter(engine) as counter:
+        rows = db.execute(statement).scalars().all()
+        TypeAdapter(List[schema]).validate_python(rows)
+    db.expunge_all()
+    return counter.count, len(rows)
+
+
+def check_query_counts(engine: Engine, page_sizes: Sequence[int] = (1, 100)) -> List[Dict]:
+    """
+    Count the statements of every list endpoint's page at each page size. A
+    query is ok when every page takes exactly the expected number and the
+    largest page holds more rows than the smallest size (otherwise the
+    tables are too empty to tell)
+    """
+    results = []
+    with Session(engine) as db:
+        for name, (page, schema, expected) in response_pages(db).items():
+            counts, rows = zip(*(count_page_queries(engine, db, page(limit), schema) for limit in page_sizes))
+            results.append({
+                'query': name,
+                'expected': expected,
+                'counts': dict(zip(page_sizes, counts)),
+                'rows': max(rows),
+                'ok': all(count == expected for count in counts) and max(rows) > min(page_sizes),
+            })
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Check that the list endpoints load their response schemas in a fixed number of queries"
+    )
+    parser.add_argument("--database-url", help="database to check (default: DATABASE_URL)")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[1, 100],
+                        help="page sizes to compare (the busiest owner needs more rows than the smallest)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        from app.database import engine
+
+    results = check_query_counts(engine, args.page_sizes)
+    for result in results:
+        if result['ok']:
+            log, verdict = logger.info, "ok"
+        elif result['rows'] <= min(args.page_sizes):
+            log, verdict = logger.error, "NOT ENOUGH ROWS"
+        else:
+            log, verdict = logger.error, "TOO MANY QUERIES"
+        log("%-16s %s (expected %d, %s; largest page %d rows)", result['query'], verdict, result['expected'],
+            ", ".join(f"limit {size}: {count} queries" for size, count in result['counts'].items()), result['rows'])
+
+    if not all(result['ok'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
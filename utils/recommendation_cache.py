@@ -0,0 +1,6 @@
+from app.config import settings
+from utils.cache import TTLCache
+
+# Ranked recommendation ids per user, as (limit computed for, user ids).
+# Kept apart from utils.recommender so invalidating it does not import NumPy.
+recommendation_cache = TTLCache(settings.RECOMMENDATION_CACHE_SIZE, settings.RECOMMENDATION_CACHE_TTL_SECONDS)
@@ -0,0 +1,49 @@
+import secrets
+from typing import List, Optional, Tuple
+
+from app.config import settings
+from utils.cache import TTLCache
+from utils.cursors import decode_cursor, encode_cursor
+
+# Ranked user ids per (user id, snapshot id), so later pages never recompute
+feed_snapshots = TTLCache(settings.RECOMMENDATION_FEED_SNAPSHOTS, settings.RECOMMENDATION_FEED_TTL_SECONDS)
+
+
+def create_snapshot(user_id: int, ranked_user_ids: List[int]) -> str:
+    """
+    Store a ranked list for `user_id` and return its snapshot id
+    """
+    snapshot_id = secrets.token_urlsafe(8)
+    feed_snapshots.set((user_id, snapshot_id), ranked_user_ids)
+    return snapshot_id
+
+
+def get_snapshot(user_id: int, snapshot_id: str) -> Optional[List[int]]:
+    """
+    The ranked list of a snapshot, or None once it has expired or been evicted
+    """
+    return feed_snapshots.get((user_id, snapshot_id))
+
+
+def snapshot_page(snapshot_id: str, ranked_user_ids: List[int], offset: int,
+                  limit: int) -> Tuple[List[int], Optional[str]]:
+    """
+    One page of a snapshot and the cursor of the next page (None on the last page)
+    """
+    page = ranked_user_ids[offset:offset + limit]
+    next_offset = offset + len(page)
+    next_cursor = None
+    if page and next_offset < len(ranked_user_ids):
+        next_cursor = encode_cursor({'s': snapshot_id, 'o': next_offset})
+    return page, next_cursor
+
+
+def parse_feed_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    (snapshot id, offset) of a feed cursor; raises ValueError if it is malformed
+    """
+    payload = decode_cursor(cursor)
+    snapshot_id, offset = payload.get('s'), payload.get('o')
+    if not isinstance(snapshot_id, str) or not isinstance(offset, int) or offset < 0:
+        raise ValueError("Malformed cursor")
+    return snapshot_id, offset
@@ -0,0 +1,139 @@
+import argparse
+import logging
+import time
+from typing import Iterable, List, Optional, Set, Union
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.engagement import Recommendation, RecommendationRefresh
+from app.models.profile import Profile
+from app.models.user import User
+from utils.recommendation_store import HYBRID_SOURCE, SERVABLE_STATUSES, store_recommendations
+from utils.recommendation_cache import recommendation_cache
+
+logger = logging.getLogger(__name__)
+
+
+# Session.info key of the users whose cached recommendations are dropped
+# once the session commits
+PENDING_INVALIDATIONS = 'recommendation_cache_invalidations'
+
+
+def mark_dirty(db: Union[Session, AsyncSession], user_id: int, reason: str):
+    """
+    Queue a user whose recommendation inputs changed and drop their cached
+    recommendations; does not commit, so the mark lands in the same
+    transaction as the change itself. The cache entry is dropped after that
+    transaction commits, so a concurrent request cannot cache recommendations
+    built from the data it replaces.
+    """
+    db.add(RecommendationRefresh(user_id=user_id, reason=reason))
+    db.info.setdefault(PENDING_INVALIDATIONS, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    for user_id in session.info.pop(PENDING_INVALIDATIONS, ()):
+        recommendation_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session):
+    session.info.pop(PENDING_INVALIDATIONS, None)
+
+
+def affected_user_ids(db: Session, user_ids: Iterable[int]) -> Set[int]:
+    """
+    The changed users plus every user who currently has one of them among
+    their stored recommendations
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return user_ids
+
+    holders = db.query(Recommendation.user_id).filter(
+        Recommendation.recommended_user_id.in_(user_ids),
+        Recommendation.source == HYBRID_SOURCE,
+        Recommendation.status.in_(SERVABLE_STATUSES)
+    ).distinct().all()
+    return user_ids | {row[0] for row in holders}
+
+
+def refresh_recommendations(db: Session, user_ids: Iterable[int], top_n: int = 50) -> int:
+    """
+    Recompute stored recommendations for the given users. Users that are no
+    longer active (or have no profile) get their servable rows cleared.
+    Does not commit. Returns the number of users recomputed.
+    """
+    # Imported here so routers calling mark_dirty do not load NumPy
+    from utils.recommender import Recommender
+
+    user_ids = sorted(user_ids)
+    active = {
+        row[0] for row in db.query(User.user_id).join(Profile, Profile.user_id == User.user_id).filter(
+            User.user_id.in_(user_ids),
+            User.account_status == 'active'
+        ).all()
+    }
+
+    recommender = Recommender(db)
+    recommendations = {
+        user_id: recommender.hybrid_recommendation(user_id, top_n, exclude_recommended=False)
+        if user_id in active else []
+        for user_id in user_ids
+    }
+    store_recommendations(db, recommendations)
+    return len(active)
+
+
+def process_refresh_queue(db: Session, batch_size: int = 500, top_n: int = 50) -> int:
+    """
+    Drain up to `batch_size` queued marks, re-score the affected users and
+    delete the processed marks in one transaction. Returns the number of marks processed.
+    """
+    marks = db.query(RecommendationRefresh.refresh_id, RecommendationRefresh.user_id).order_by(
+        RecommendationRefresh.refresh_id
+    ).limit(batch_size).all()
+    if not marks:
+        return 0
+
+    user_ids = affected_user_ids(db, (mark.user_id for mark in marks))
+    refreshed = refresh_recommendations(db, user_ids, top_n)
+
+    db.query(RecommendationRefresh).filter(
+        RecommendationRefresh.refresh_id.in_([mark.refresh_id for mark in marks])
+    ).delete(synchronize_session=False)
+    db.commit()
+
+    logger.info("Processed %d refresh marks, recomputed %d users", len(marks), refreshed)
+    return len(marks)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Refresh stored recommendations for changed users")
+    parser.add_argument("--batch-size", type=int, default=500, help="queued marks per transaction")
+    parser.add_argument("--top-n", type=int, default=50, help="recommendations stored per user")
+    parser.add_argument("--interval", type=float, default=60.0, help="seconds to sleep when the queue is empty")
+    parser.add_argument("--once", action="store_true", help="drain the queue once and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    while True:
+        db = SessionLocal()
+        try:
+            processed = process_refresh_queue(db, args.batch_size, args.top_n)
+        finally:
+            db.close()
+
+        if not processed:
+            if args.once:
+                break
+            time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
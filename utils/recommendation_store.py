@@ -0,0 +1,125 @@
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.engagement import Recommendation
+from app.schemas.engagement import RecommendationCreate
+
+# Statuses that can still be shown to the user; 'interacted' rows are history
+SERVABLE_STATUSES = ('active', 'viewed')
+
+# Recommendation.source of the rows each job owns. /recommendations and the
+# feed serve HYBRID_SOURCE rows; MATCHMAKER_SOURCE rows are the parallel
+# matchmaking sweep's reciprocal potential matches
+HYBRID_SOURCE = 'hybrid'
+MATCHMAKER_SOURCE = 'matchmaker'
+
+
+def store_recommendations(
+        db: Session,
+        recommendations_by_user: Dict[int, List[RecommendationCreate]],
+        source: str = HYBRID_SOURCE
+) -> Tuple[int, int, int]:
+    """
+    Bulk-upsert precomputed recommendations for a batch of users.
+
+    Only the rows of `source` are touched, so jobs ranking different sources
+    do not replace each other's rows. Existing rows for the same pair keep
+    their status and get the new score and reason, new pairs are inserted as
+    'active', and servable rows that are no longer ranked are deleted. Does
+    not commit. Returns (inserted, updated, deleted).
+    """
+    user_ids = list(recommendations_by_user)
+    if not user_ids:
+        return 0, 0, 0
+
+    existing = db.query(
+        Recommendation.recommendation_id,
+        Recommendation.user_id,
+        Recommendation.recommended_user_id,
+        Recommendation.status
+    ).filter(Recommendation.user_id.in_(user_ids), Recommendation.source == source).all()
+    existing_by_pair = {(row.user_id, row.recommended_user_id): row for row in existing}
+
+    inserts, updates, ranked_pairs = [], [], set()
+    for user_id, recommendations in recommendations_by_user.items():
+        for rec in recommendations:
+            pair = (user_id, rec.recommended_user_id)
+            ranked_pairs.add(pair)
+            current = existing_by_pair.get(pair)
+            if current:
+                updates.append({
+                    'recommendation_id': current.recommendation_id,
+                    'recommendation_score': rec.recommendation_score,
+                    'reason': rec.reason
+                })
+            else:
+                inserts.append({
+                    'user_id': user_id,
+                    'recommended_user_id': rec.recommended_user_id,
+                    'recommendation_score': rec.recommendation_score,
+                    'reason': rec.reason,
+                    'status': 'active',
+                    'source': source
+                })
+
+    stale = [
+        row.recommendation_id for row in existing
+        if row.status in SERVABLE_STATUSES and (row.user_id, row.recommended_user_id) not in ranked_pairs
+    ]
+
+    if stale:
+        db.query(Recommendation).filter(
+            Recommendation.recommendation_id.in_(stale)
+        ).delete(synchronize_session=False)
+    if updates:
+        db.bulk_update_mappings(Recommendation, updates)
+    if inserts:
+        db.bulk_insert_mappings(Recommendation, inserts)
+
+    return len(inserts), len(updates), len(stale)
+
+
+def fetch_stored_recommendations(
+        db: Session,
+        user_id: int,
+        limit: int = 10,
+        source: str = HYBRID_SOURCE
+) -> List[int]:
+    """
+    Best precomputed recommendations of `source` for a user, as recommended user ids.
+    Rows served for the first time move from 'active' to 'viewed'.
+    """
+    rows = db.query(Recommendation.recommendation_id, Recommendation.recommended_user_id, Recommendation.status).filter(
+        Recommendation.user_id == user_id,
+        Recommendation.source == source,
+        Recommendation.status.in_(SERVABLE_STATUSES)
+    ).order_by(Recommendation.recommendation_score.desc()).limit(limit).all()
+
+    unseen = [row.recommendation_id for row in rows if row.status == 'active']
+    if unseen:
+        db.query(Recommendation).filter(
+            Recommendation.recommendation_id.in_(unseen)
+        ).update({Recommendation.status: 'viewed'}, synchronize_session=False)
+        db.commit()
+
+    return [row.recommended_user_id for row in rows]
+
+
+def mark_recommendation_interacted(db: Session, user_id: int, recommended_user_id: int):
+    """
+    Mark a recommendation as acted upon (liked, passed); does not commit
+    """
+    mark_recommendations_interacted(db, user_id, [recommended_user_id])
+
+
+def mark_recommendations_interacted(db: Session, user_id: int, recommended_user_ids: List[int]):
+    """
+    Mark several recommendations of one user as acted upon in one UPDATE; does not commit
+    """
+    if not recommended_user_ids:
+        return
+    db.query(Recommendation).filter(
+        Recommendation.user_id == user_id,
+        Recommendation.recommended_user_id.in_(recommended_user_ids)
+    ).update({Recommendation.status: 'interacted'}, synchronize_session=False)
@@ -1,30 +1,44 @@
-from typing import List, Dict
+from typing import List, Optional
 import numpy as np
-import pandas as pd
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models.engagement import Recommendation
-from app.models.interaction import Like
 from app.models.preference import Preference
 from app.models.profile import Profile
 from app.models.security import BlockedUser
 from app.models.user import User
 from app.schemas.engagement import RecommendationCreate
+from utils.ann_index import get_ann_index
+from utils.candidates import candidate_query
+from utils.hobbies import hobby_tokens
+from utils.like_graph import get_like_graph
+from utils.profile_matrix import ATTRIBUTE_WEIGHTS, ProfileMatrix, PROFILE_MATRIX_COLUMNS
+from utils.recommendation_cache import recommendation_cache
 
 
 class Recommender:
     def __init__(self, db: Session):
         self.db = db
 
-    def hybrid_recommendation(self, user_id: int, limit: int = 10) -> List[RecommendationCreate]:
+    def hybrid_recommendation(
+            self,
+            user_id: int,
+            limit: int = 10,
+            exclude_recommended: bool = True
+    ) -> List[RecommendationCreate]:
         """
-        Hybrid recommendation combining content-based and collaborative filtering
+        Hybrid recommendation combining content-based and collaborative filtering.
+        Users already stored in `recommendations` are skipped unless
+        `exclude_recommended` is False (used when recomputing the stored rows);
+        users already liked or interacted with are always skipped, so a
+        recomputation ranks `limit` servable users.
         """
         # Content-based recommendations
-        content_recs = self.content_based_recommendation(user_id, limit * 2)
+        content_recs = self.content_based_recommendation(user_id, limit * 2, exclude_recommended)
 
         # Collaborative filtering recommendations
-        collab_recs = self.collaborative_filtering(user_id, limit * 2)
+        collab_recs = self.collaborative_filtering(user_id, limit * 2, exclude_recommended)
 
         # Combine and deduplicate recommendations
         all_recs = {}
@@ -51,64 +65,103 @@ class Recommender:
 
         return combined_recs[:limit]
 
-    def content_based_recommendation(self, user_id: int, limit: int = 10) -> List[RecommendationCreate]:
+    def recommended_user_ids(self, user_id: int, limit: int = 10) -> List[int]:
+        """
+        Hybrid recommendations as ranked user ids, served from the per-user
+        cache while fresh. A cached list also serves smaller limits, and larger
+        ones when it was already shorter than the limit it was computed for.
+        """
+        cached = recommendation_cache.get(user_id)
+        if cached is not None:
+            cached_limit, user_ids = cached
+            if limit <= cached_limit or len(user_ids) < cached_limit:
+                return user_ids[:limit]
+
+        user_ids = [rec.recommended_user_id for rec in self.hybrid_recommendation(user_id, limit)]
+        recommendation_cache.set(user_id, (limit, user_ids))
+        return user_ids
+
+    def content_based_recommendation(
+            self,
+            user_id: int,
+            limit: int = 10,
+            exclude_recommended: bool = True
+    ) -> List[RecommendationCreate]:
         """
         Content-based recommendation using user profiles and preferences
         """
-        user = self.db.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            return []
-
-        user_profile = self.db.query(Profile).filter(Profile.user_id == user_id).first()
         user_pref = self.db.query(Preference).filter(Preference.user_id == user_id).first()
 
-        if not user_profile:
+        # Load the user and every candidate passing the hard filters in one query;
+        # blocked, liked / interacted (and already recommended) users are excluded in SQL
+        matrix = ProfileMatrix.from_query(candidate_query(
+            self.db, user_id, PROFILE_MATRIX_COLUMNS,
+            pref=user_pref,
+            exclude_recommended=exclude_recommended,
+            exclude_interacted=True,
+            user_ids=self.ann_candidates(user_id)
+        ))
+
+        row = matrix.position(user_id)
+        if row is None:
             return []
 
-        # Get all active users who are not blocked
-        all_users = self.db.query(User).filter(
-            User.user_id != user_id,
-            User.account_status == 'active'
+        eligible = np.ones(len(matrix), dtype=bool)
+        eligible[row] = False
+
+        # Calculate similarity scores for all candidates at once
+        scores = np.clip(matrix.similarity(row), 0.0, 1.0)
+
+        # Only consider recommendations with at least 30% similarity
+        candidates = np.flatnonzero(eligible & (scores > 0.3))
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')][:limit]
+
+        return [
+            RecommendationCreate(
+                user_id=user_id,
+                recommended_user_id=int(matrix.user_ids[i]),
+                recommendation_score=float(scores[i]),
+                reason="Content-based similarity"
+            )
+            for i in ranked
+        ]
+
+    def ann_candidates(self, user_id: int) -> Optional[List[int]]:
+        """
+        Most similar users according to the ANN index, or None to score every
+        candidate (small population, or user not indexed yet)
+        """
+        if settings.ANN_MIN_POPULATION <= 0:
+            return None
+
+        index = get_ann_index(self.db, settings.ANN_INDEX_TTL_SECONDS)
+        if len(index) < settings.ANN_MIN_POPULATION:
+            return None
+
+        candidate_ids = index.search(user_id, settings.ANN_CANDIDATES, settings.ANN_NPROBE)
+        return candidate_ids.tolist() if candidate_ids.size else None
+
+    def excluded_user_ids(self, user_id: int, exclude_recommended: bool = True) -> List[int]:
+        """
+        Users that must not be recommended: blocked in either direction,
+        already interacted with and, unless disabled, already recommended
+        (the user's own likes are masked by the like graph)
+        """
+        recommended = self.db.query(Recommendation.recommended_user_id).filter(
+            Recommendation.user_id == user_id
+        )
+        if not exclude_recommended:
+            recommended = recommended.filter(Recommendation.status == 'interacted')
+        recommended = recommended.all()
+
+        blocked = self.db.query(BlockedUser.blocker_user_id, BlockedUser.blocked_user_id).filter(
+            (BlockedUser.blocker_user_id == user_id) | (BlockedUser.blocked_user_id == user_id)
         ).all()
 
-        recommendations = []
-        for other_user in all_users:
-            # Skip if already recommended
-            existing_rec = self.db.query(Recommendation).filter(
-                Recommendation.user_id == user_id,
-                Recommendation.recommended_user_id == other_user.user_id
-            ).first()
-
-            if existing_rec:
-                continue
-
-            # Skip if blocked
-            blocked = self.db.query(BlockedUser).filter(
-                ((BlockedUser.blocker_user_id == user_id) & (BlockedUser.blocked_user_id == other_user.user_id)) |
-                ((BlockedUser.blocker_user_id == other_user.user_id) & (BlockedUser.blocked_user_id == user_id))
-            ).first()
-
-            if blocked:
-                continue
-
-            other_profile = self.db.query(Profile).filter(Profile.user_id == other_user.user_id).first()
-            if not other_profile:
-                continue
-
-            # Calculate similarity score
-            score = self.calculate_content_similarity(user_profile, other_profile, user_pref)
-
-            if score > 0.3:  # Only consider recommendations with at least 30% similarity
-                recommendations.append(RecommendationCreate(
-                    user_id=user_id,
-                    recommended_user_id=other_user.user_id,
-                    recommendation_score=score,
-                    reason="Content-based similarity"
-                ))
-
-        # Sort by score and limit results
-        recommendations.sort(key=lambda x: x.recommendation_score, reverse=True)
-        return recommendations[:limit]
+        excluded = {r[0] for r in recommended}
+        for blocker_id, blocked_id in blocked:
+            excluded.add(blocked_id if blocker_id == user_id else blocker_id)
+        return list(excluded)
 
     def calculate_content_similarity(self, profile1: Profile, profile2: Profile, pref1: Preference = None) -> float:
         """
@@ -116,31 +169,16 @@ class Recommender:
         """
         score = 0.0
 
-        # Define attribute weights
-        attribute_weights = {
-            'religion_text': 0.15,
-            'caste_text': 0.1,
-            'education_level_text': 0.1,
-            'profession_text': 0.1,
-            'city_text': 0.05,
-            'district_text': 0.05,
-            'hobbies_interests': 0.1,
-            'annual_salary_npr': 0.05,
-            'rashi': 0.1,
-            'nakshatra': 0.1,
-            'manglik_status': 0.1
-        }
-
-        # Calculate similarity for each attribute
-        for attr, weight in attribute_weights.items():
+        # Calculate similarity for each attribute (same weights as ProfileMatrix.similarity)
+        for attr, weight in ATTRIBUTE_WEIGHTS.items():
             val1 = getattr(profile1, attr, None)
             val2 = getattr(profile2, attr, None)
 
             if val1 and val2:
                 if attr == 'hobbies_interests':
                     # For hobbies, calculate Jaccard similarity
-                    hobbies1 = set(val1.split(','))
-                    hobbies2 = set(val2.split(','))
+                    hobbies1 = hobby_tokens(val1)
+                    hobbies2 = hobby_tokens(val2)
                     intersection = len(hobbies1.intersection(hobbies2))
                     union = len(hobbies1.union(hobbies2))
                     if union > 0:
@@ -183,73 +221,40 @@ class Recommender:
         today = datetime.today().date()
         return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
 
-    def collaborative_filtering(self, user_id: int, limit: int = 10) -> List[RecommendationCreate]:
+    def collaborative_filtering(
+            self,
+            user_id: int,
+            limit: int = 10,
+            exclude_recommended: bool = True
+    ) -> List[RecommendationCreate]:
         """
         Collaborative filtering based on user interactions (likes)
         """
-        # Get all likes by the user
-        user_likes = self.db.query(Like).filter(Like.liker_user_id == user_id).all()
-
-        if not user_likes:
-            return []
-
-        # Find users who liked the same profiles
-        similar_users = {}
-        for like in user_likes:
-            # Get users who also liked this profile
-            common_likers = self.db.query(Like).filter(
-                Like.liked_user_id == like.liked_user_id,
-                Like.liker_user_id != user_id
+        like_graph = get_like_graph(self.db)
+
+        # Similar users share liked profiles; their other likes become candidates
+        recommended = like_graph.recommend(
+            user_id,
+            limit=None,
+            neighbours=5,  # Top 5 similar users
+            exclude=self.excluded_user_ids(user_id, exclude_recommended)
+        )
+
+        # Only recommend users whose accounts are still active
+        active = {
+            row[0] for row in self.db.query(User.user_id).filter(
+                User.user_id.in_([recommended_user_id for recommended_user_id, _ in recommended]),
+                User.account_status == 'active'
             ).all()
-
-            for common_like in common_likers:
-                if common_like.liker_user_id not in similar_users:
-                    similar_users[common_like.liker_user_id] = 1
-                else:
-                    similar_users[common_like.liker_user_id] += 1
-
-        if not similar_users:
-            return []
-
-        # Sort similar users by number of common likes
-        sorted_similar_users = sorted(similar_users.items(), key=lambda x: x[1], reverse=True)
-
-        # Get recommendations from top similar users
-        recommendations = []
-        for similar_user_id, _ in sorted_similar_users[:5]:  # Top 5 similar users
-            # Get likes by similar user that the current user hasn't liked
-            similar_user_likes = self.db.query(Like).filter(
-                Like.liker_user_id == similar_user_id,
-                Like.liked_user_id.notin_([like.liked_user_id for like in user_likes])
-            ).all()
-
-            for like in similar_user_likes:
-                # Skip if already recommended
-                existing_rec = self.db.query(Recommendation).filter(
-                    Recommendation.user_id == user_id,
-                    Recommendation.recommended_user_id == like.liked_user_id
-                ).first()
-
-                if existing_rec:
-                    continue
-
-                # Skip if blocked
-                blocked = self.db.query(BlockedUser).filter(
-                    ((BlockedUser.blocker_user_id == user_id) & (BlockedUser.blocked_user_id == like.liked_user_id)) |
-                    ((BlockedUser.blocker_user_id == like.liked_user_id) & (BlockedUser.blocked_user_id == user_id))
-                ).first()
-
-                if blocked:
-                    continue
-
-                # Add recommendation with weight based on similarity
-                recommendations.append(RecommendationCreate(
-                    user_id=user_id,
-                    recommended_user_id=like.liked_user_id,
-                    recommendation_score=min(similar_users[similar_user_id] / len(user_likes), 1.0),
-                    reason=f"Recommended by users with similar preferences"
-                ))
-
-        # Sort by score and limit results
-        recommendations.sort(key=lambda x: x.recommendation_score, reverse=True)
-        return recommendations[:limit]
\ No newline at end of file
+        } if recommended else set()
+        recommended = [rec for rec in recommended if rec[0] in active][:limit]
+
+        return [
+            RecommendationCreate(
+                user_id=user_id,
+                recommended_user_id=recommended_user_id,
+                recommendation_score=score,
+                reason="Recommended by users with similar preferences"
+            )
+            for recommended_user_id, score in recommended
+        ]
@@ -1,16 +1,18 @@
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, NamedTuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models.admin import Admin
 from app.models.user import User
 from app.schemas.user import TokenData
 from app.schemas.admin import AdminToken
+from utils.cache import TTLCache
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -20,6 +22,35 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 admin_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/admin/login")
 
 
+class AuthenticatedUser(NamedTuple):
+    """
+    The fields of an authenticated user needed for authorization; handlers
+    needing the rest of the row load it themselves
+    """
+    user_id: int
+    account_status: str
+
+
+class AuthenticatedAdmin(NamedTuple):
+    admin_id: int
+    is_active: bool
+
+
+# Authorization fields by user / admin id, so authenticated requests skip the
+# users / admins lookup. Entries are dropped when an admin changes a user's
+# status; other workers see the change once their entry expires.
+user_auth_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+admin_auth_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_user_auth(user_id: int):
+    user_auth_cache.invalidate(user_id)
+
+
+def invalidate_admin_auth(admin_id: int):
+    admin_auth_cache.invalidate(admin_id)
+
+
 # --------------------------
 # Common Security Functions
 # --------------------------
@@ -49,8 +80,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 async def get_current_user(
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
-) -> User:
+        db: AsyncSession = Depends(get_async_db)
+) -> AuthenticatedUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -65,16 +96,23 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.user_id == token_data.user_id).first()
+    user = user_auth_cache.get(token_data.user_id)
     if user is None:
-        raise credentials_exception
+        result = await db.execute(
+            select(User.user_id, User.account_status).where(User.user_id == token_data.user_id)
+        )
+        row = result.first()
+        if row is None:
+            raise credentials_exception
+        user = AuthenticatedUser(row.user_id, row.account_status)
+        user_auth_cache.set(user.user_id, user)
 
     return user
 
 
 async def get_current_active_user(
-        current_user: User = Depends(get_current_user)
-) -> User:
+        current_user: AuthenticatedUser = Depends(get_current_user)
+) -> AuthenticatedUser:
     if current_user.account_status != "active":
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
@@ -97,8 +135,8 @@ def create_admin_access_token(data: dict, expires_delta: Optional[timedelta] = N
 
 async def get_current_admin(
         token: str = Depends(admin_oauth2_scheme),
-        db: Session = Depends(get_db)
-) -> Admin:
+        db: AsyncSession = Depends(get_async_db)
+) -> AuthenticatedAdmin:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate admin credentials",
@@ -113,16 +151,23 @@ async def get_current_admin(
     except JWTError:
         raise credentials_exception
 
-    admin = db.query(Admin).filter(Admin.admin_id == token_data["admin_id"]).first()
+    admin = admin_auth_cache.get(token_data["admin_id"])
     if admin is None:
-        raise credentials_exception
+        result = await db.execute(
+            select(Admin.admin_id, Admin.is_active).where(Admin.admin_id == token_data["admin_id"])
+        )
+        row = result.first()
+        if row is None:
+            raise credentials_exception
+        admin = AuthenticatedAdmin(row.admin_id, row.is_active)
+        admin_auth_cache.set(admin.admin_id, admin)
 
     return admin
 
 
 async def get_current_active_admin(
-        current_admin: Admin = Depends(get_current_admin)
-) -> Admin:
+        current_admin: AuthenticatedAdmin = Depends(get_current_admin)
+) -> AuthenticatedAdmin:
     if not current_admin.is_active:
         raise HTTPException(status_code=400, detail="Inactive admin account")
     return current_admin
@@ -0,0 +1,271 @@
+import argparse
+import logging
+import time
+from datetime import date, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import create_engine, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import admin, engagement  # noqa: F401  (register their tables on Base.metadata)
+from app.models.base import Base
+from app.models.interaction import Like
+from app.models.preference import Preference
+from app.models.profile import Profile
+from app.models.security import BlockedUser
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Caste/ethnic group -> (population share, religion mix), rounded from the 2021
+# census; rare groups are folded into 'Other'. Overall this gives roughly 81%
+# Hindu, 8% Buddhist, 5% Islam, 3% Kirat and 2% Christian.
+CASTES: Dict[str, Tuple[float, Dict[str, float]]] = {
+    'Chhetri': (0.17, {'Hindu': 1.0}),
+    'Brahmin': (0.12, {'Hindu': 1.0}),
+    'Magar': (0.07, {'Hindu': 0.7, 'Buddhist': 0.25, 'Christian': 0.05}),
+    'Tharu': (0.06, {'Hindu': 0.95, 'Christian': 0.05}),
+    'Tamang': (0.06, {'Buddhist': 0.85, 'Hindu': 0.1, 'Christian': 0.05}),
+    'Newar': (0.05, {'Hindu': 0.85, 'Buddhist': 0.15}),
+    'Kami': (0.05, {'Hindu': 0.95, 'Christian': 0.05}),
+    'Musalman': (0.05, {'Islam': 1.0}),
+    'Yadav': (0.04, {'Hindu': 1.0}),
+    'Rai': (0.02, {'Kirat': 0.7, 'Hindu': 0.2, 'Christian': 0.1}),
+    'Gurung': (0.02, {'Buddhist': 0.6, 'Hindu': 0.35, 'Christian': 0.05}),
+    'Damai': (0.02, {'Hindu': 0.95, 'Christian': 0.05}),
+    'Thakuri': (0.02, {'Hindu': 1.0}),
+    'Limbu': (0.02, {'Kirat': 0.8, 'Hindu': 0.1, 'Christian': 0.1}),
+    'Sarki': (0.01, {'Hindu': 1.0}),
+    'Sherpa': (0.01, {'Buddhist': 1.0}),
+    'Other': (0.21, {'Hindu': 0.8, 'Buddhist': 0.06, 'Islam': 0.05, 'Kirat': 0.03, 'Christian': 0.04, 'Other': 0.02}),
+}
+
+# District -> (share of users, main city)
+DISTRICTS: Dict[str, Tuple[float, str]] = {
+    'Kathmandu': (0.22, 'Kathmandu'),
+    'Lalitpur': (0.07, 'Lalitpur'),
+    'Bhaktapur': (0.04, 'Bhaktapur'),
+    'Kaski': (0.07, 'Pokhara'),
+    'Morang': (0.07, 'Biratnagar'),
+    'Sunsari': (0.05, 'Dharan'),
+    'Jhapa': (0.06, 'Birtamod'),
+    'Chitwan': (0.06, 'Bharatpur'),
+    'Rupandehi': (0.06, 'Butwal'),
+    'Parsa': (0.04, 'Birgunj'),
+    'Dhanusha': (0.04, 'Janakpur'),
+    'Banke': (0.04, 'Nepalgunj'),
+    'Kailali': (0.05, 'Dhangadhi'),
+    'Makwanpur': (0.03, 'Hetauda'),
+    'Surkhet': (0.03, 'Birendranagar'),
+    'Dang': (0.07, 'Ghorahi'),
+}
+
+RASHIS = ['Mesh', 'Brish', 'Mithun', 'Karkat', 'Simha', 'Kanya',
+          'Tula', 'Brishchik', 'Dhanu', 'Makar', 'Kumbha', 'Meen']
+
+NAKSHATRAS = [
+    'Ashwini', 'Bharani', 'Krittika', 'Rohini', 'Mrigashira', 'Ardra', 'Punarvasu', 'Pushya', 'Ashlesha',
+    'Magha', 'Purva Phalguni', 'Uttara Phalguni', 'Hasta', 'Chitra', 'Swati', 'Vishakha', 'Anuradha',
+    'Jyeshtha', 'Mula', 'Purva Ashadha', 'Uttara Ashadha', 'Shravana', 'Dhanishta', 'Shatabhisha',
+    'Purva Bhadrapada', 'Uttara Bhadrapada', 'Revati'
+]
+
+MANGLIK_STATUSES = {'Non-Manglik': 0.6, 'Manglik': 0.25, 'Anshik Manglik': 0.15}
+
+EDUCATION_LEVELS = {'SEE': 0.08, '+2': 0.22, "Bachelor's": 0.42, "Master's": 0.25, 'PhD': 0.03}
+
+PROFESSIONS = {
+    'Engineer': 0.09, 'Doctor': 0.04, 'Nurse': 0.06, 'Teacher': 0.12, 'Civil Servant': 0.1,
+    'Banker': 0.07, 'IT Professional': 0.1, 'Business': 0.14, 'Lawyer': 0.03, 'Accountant': 0.06,
+    'Working Abroad': 0.1, 'Student': 0.09,
+}
+
+HOBBIES = {
+    'Music': 0.12, 'Travelling': 0.11, 'Reading': 0.09, 'Trekking': 0.07, 'Cooking': 0.08,
+    'Dancing': 0.06, 'Cricket': 0.06, 'Football': 0.06, 'Movies': 0.1, 'Photography': 0.05,
+    'Yoga': 0.04, 'Meditation': 0.03, 'Gardening': 0.03, 'Singing': 0.04, 'Painting': 0.02,
+    'Writing': 0.02, 'Volunteering': 0.02,
+}
+
+FIRST_NAMES = {
+    'male': ['Aarav', 'Bibek', 'Bishal', 'Dipesh', 'Kiran', 'Manish', 'Nabin', 'Prakash', 'Rajesh',
+             'Roshan', 'Sagar', 'Sandeep', 'Sujan', 'Suman', 'Tenzing', 'Umesh'],
+    'female': ['Aastha', 'Anjali', 'Asmita', 'Binita', 'Gita', 'Kabita', 'Manisha', 'Nisha', 'Pooja',
+               'Prabina', 'Rojina', 'Sabina', 'Sarita', 'Sita', 'Sunita', 'Pema'],
+}
+
+
+def _choice(rng: np.random.Generator, weights: Dict[str, float], size: int) -> np.ndarray:
+    values = list(weights)
+    p = np.asarray([weights[value] for value in values], dtype=float)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=p / p.sum())]
+
+
+def create_database_engine(url: str) -> Engine:
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def generate_population(
+        db: Session,
+        users: int,
+        seed: int = 0,
+        preference_rate: float = 0.7,
+        likes_per_user: float = 20.0,
+        block_rate: float = 0.02,
+        inactive_rate: float = 0.08,
+        batch_size: int = 5000,
+        today: Optional[date] = None
+) -> Dict[str, int]:
+    """
+    Insert `users` synthetic users with profiles, preferences, likes and
+    blocks. The same seed always produces the same population. New user ids
+    continue after the highest existing one. Commits once per table batch.
+    Returns the number of rows inserted per table.
+    """
+    rng = np.random.default_rng(seed)
+    today = today or date.today()
+    first_id = (db.query(func.max(User.user_id)).scalar() or 0) + 1
+    user_ids = np.arange(first_id, first_id + users, dtype=np.int64)
+
+    genders = np.where(rng.random(users) < 0.5, 'male', 'female')
+    ages = np.clip(np.rint(rng.normal(28, 4.5, users)), 20, 45).astype(int)
+    birth_dates = [today - timedelta(days=int(age * 365.25 + offset))
+                   for age, offset in zip(ages, rng.integers(0, 365, users))]
+    heights = np.rint(np.where(genders == 'male', rng.normal(168, 7, users), rng.normal(155, 6, users))).astype(int)
+
+    castes = _choice(rng, {caste: share for caste, (share, _) in CASTES.items()}, users)
+    religions = np.empty(users, dtype=object)
+    for caste, (_, religion_mix) in CASTES.items():
+        members = np.flatnonzero(castes == caste)
+        religions[members] = _choice(rng, religion_mix, members.size)
+    districts = _choice(rng, {district: share for district, (share, _) in DISTRICTS.items()}, users)
+    professions = _choice(rng, PROFESSIONS, users)
+    education = _choice(rng, EDUCATION_LEVELS, users)
+    manglik = _choice(rng, MANGLIK_STATUSES, users)
+    rashis = rng.choice(RASHIS, users)
+    nakshatras = rng.choice(NAKSHATRAS, users)
+    salaries = np.round(rng.lognormal(13.3, 0.6, users), -4).astype(int)
+    hobby_names = list(HOBBIES)
+    hobby_p = np.asarray([HOBBIES[name] for name in hobby_names])
+    hobby_p = hobby_p / hobby_p.sum()
+    statuses = np.where(rng.random(users) < inactive_rate, 'inactive', 'active')
+
+    user_rows, profile_rows, preference_rows = [], [], []
+    for i, user_id in enumerate(user_ids.tolist()):
+        gender = str(genders[i])
+        user_rows.append({
+            'user_id': user_id,
+            'email': f"user{user_id}@example.com",
+            'password_hash': '!',  # cannot log in
+            'auth_provider': 'email',
+            'is_email_verified': True,
+            'account_status': str(statuses[i]),
+        })
+
+        missing = rng.random(4) < (0.1, 0.15, 0.2, 0.1)
+        hobbies = rng.choice(hobby_names, size=int(rng.integers(1, 6)), replace=False, p=hobby_p)
+        profile_rows.append({
+            'user_id': user_id,
+            'first_name': str(rng.choice(FIRST_NAMES[gender])),
+            'last_name': str(castes[i]) if castes[i] != 'Other' else 'Shrestha',
+            'date_of_birth': birth_dates[i],
+            'gender': gender,
+            'height_cm': None if missing[0] else int(heights[i]),
+            'marital_status': 'Never Married',
+            'city_text': DISTRICTS[districts[i]][1],
+            'district_text': str(districts[i]),
+            'country': 'Nepal',
+            'education_level_text': str(education[i]),
+            'profession_text': str(professions[i]),
+            'annual_salary_npr': None if missing[1] else int(salaries[i]),
+            'religion_text': str(religions[i]),
+            'caste_text': str(castes[i]),
+            'hobbies_interests': None if missing[2] else ','.join(hobbies),
+            'rashi': None if missing[3] else str(rashis[i]),
+            'nakshatra': None if missing[3] else str(nakshatras[i]),
+            'manglik_status': None if missing[3] else str(manglik[i]),
+            'profile_completion_percentage': int(rng.integers(40, 101)),
+            'profile_visibility': 'public',
+        })
+
+        if rng.random() < preference_rate:
+            # Men mostly look for someone younger, women for someone older
+            shift = -2 if gender == 'male' else 2
+            preference_rows.append({
+                'user_id': user_id,
+                'min_age': int(max(18, ages[i] + shift - rng.integers(2, 6))),
+                'max_age': int(ages[i] + shift + rng.integers(2, 6)),
+                'min_height_cm': int(rng.choice([0, 150, 155, 160])) or None,
+                'max_height_cm': int(rng.choice([0, 180, 190])) or None,
+                'preferred_religions_text': str(religions[i]) if rng.random() < 0.8 else None,
+                'preferred_castes_text': (
+                    ','.join(rng.choice(list(CASTES), size=int(rng.integers(1, 4)), replace=False))
+                    if rng.random() < 0.4 else None
+                ),
+            })
+
+    # Likes go to the opposite gender, skewed towards a popular minority
+    like_pairs = set()
+    for gender, other in (('male', 'female'), ('female', 'male')):
+        likers = user_ids[genders == gender]
+        targets = user_ids[genders == other]
+        if not likers.size or not targets.size:
+            continue
+        popularity = 1.0 / np.arange(1, targets.size + 1) ** 0.8
+        targets = targets[rng.permutation(targets.size)]
+        counts = rng.poisson(likes_per_user, likers.size)
+        chosen = rng.choice(targets, size=int(counts.sum()), p=popularity / popularity.sum())
+        for liker, liked in zip(np.repeat(likers, counts).tolist(), chosen.tolist()):
+            like_pairs.add((liker, liked))
+    like_rows = [{'liker_user_id': liker, 'liked_user_id': liked, 'like_type': 'like'}
+                 for liker, liked in sorted(like_pairs)]
+
+    block_count = int(users * block_rate)
+    blockers, blocked = rng.choice(user_ids, block_count), rng.choice(user_ids, block_count)
+    block_rows = [{'blocker_user_id': a, 'blocked_user_id': b}
+                  for a, b in sorted(set(zip(blockers.tolist(), blocked.tolist()))) if a != b]
+
+    counts = {}
+    for model, rows in ((User, user_rows), (Profile, profile_rows), (Preference, preference_rows),
+                        (Like, like_rows), (BlockedUser, block_rows)):
+        for start in range(0, len(rows), batch_size):
+            db.execute(model.__table__.insert(), rows[start:start + batch_size])
+        db.commit()
+        counts[model.__tablename__] = len(rows)
+    return counts
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic Nepali user population")
+    parser.add_argument("--database-url", default="sqlite:///synthetic.db",
+                        help="target database; tables are created if missing")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--likes-per-user", type=float, default=20.0)
+    parser.add_argument("--preference-rate", type=float, default=0.7)
+    parser.add_argument("--block-rate", type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    engine = create_database_engine(args.database_url)
+    db = sessionmaker(bind=engine)()
+    started = time.perf_counter()
+    try:
+        counts = generate_population(
+            db, args.users, args.seed,
+            preference_rate=args.preference_rate,
+            likes_per_user=args.likes_per_user,
+            block_rate=args.block_rate
+        )
+    finally:
+        db.close()
+    logger.info("Inserted %s in %.1fs", counts, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
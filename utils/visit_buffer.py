@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.interaction import ProfileVisit
+from utils.visit_rollup import rollup_visits
+
+logger = logging.getLogger(__name__)
+
+
+class VisitBuffer:
+    """
+    In-process ring buffer of profile visits, written with bulk inserts.
+
+    Requests only append to the buffer. Each flush inserts the raw visits and
+    updates the daily rollup in the same transaction. A background thread flushes it every
+    `flush_interval` seconds, or sooner once `flush_size` visits are waiting,
+    and once more on stop(). When the buffer is full the oldest visits are
+    dropped (and counted) rather than blocking requests. With `dedup_seconds`,
+    repeat views of the same profile by the same visitor within that window
+    are recorded once.
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], Session],
+            capacity: int = 10000,
+            flush_size: int = 500,
+            flush_interval: float = 5.0,
+            dedup_seconds: float = 0.0
+    ):
+        self.session_factory = session_factory
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.dedup_seconds = dedup_seconds
+        self._visits: deque = deque(maxlen=capacity)
+        self._last_seen: Dict[Tuple[int, int], float] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self._visits)
+
+    def record(self, visitor_user_id: int, visited_user_id: int) -> bool:
+        """
+        Queue a visit; returns False if it was a repeat within the dedup window
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.dedup_seconds > 0:
+                key = (visitor_user_id, visited_user_id)
+                last_seen = self._last_seen.get(key)
+                if last_seen is not None and now - last_seen < self.dedup_seconds:
+                    self.deduplicated += 1
+                    return False
+                self._last_seen[key] = now
+
+            if len(self._visits) == self._visits.maxlen:
+                self.dropped += 1
+            self._visits.append((visitor_user_id, visited_user_id, datetime.now(timezone.utc)))
+            self.recorded += 1
+            full = len(self._visits) >= self.flush_size
+
+        if full:
+            self._wakeup.set()
+        return True
+
+    def _take(self) -> List[Tuple[int, int, datetime]]:
+        with self._lock:
+            visits = list(self._visits)
+            self._visits.clear()
+            if self.dedup_seconds > 0:
+                cutoff = time.monotonic() - self.dedup_seconds
+                self._last_seen = {key: seen for key, seen in self._last_seen.items() if seen >= cutoff}
+            return visits
+
+    def flush(self) -> int:
+        """
+        Write every buffered visit in one bulk insert. Returns the number written.
+        """
+        with self._flush_lock:
+            visits = self._take()
+            if not visits:
+                return 0
+
+            db = self.session_factory()
+            try:
+                self.write(db, visits)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self.failed += len(visits)
+                logger.exception("Failed to write %d profile visits", len(visits))
+                return 0
+            finally:
+                db.close()
+
+            self.flushed += len(visits)
+            return len(visits)
+
+    def write(self, db: Session, visits: List[Tuple[int, int, datetime]]):
+        db.execute(ProfileVisit.__table__.insert(), [
+            {'visitor_user_id': visitor, 'visited_profile_user_id': visited, 'visit_timestamp': visited_at}
+            for visitor, visited, visited_at in visits
+        ])
+        rollup_visits(db, visits)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="visit-buffer-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop the flush thread and write whatever is still buffered
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'buffered': len(self._visits),
+            'capacity': self._visits.maxlen,
+            'recorded': self.recorded,
+            'deduplicated': self.deduplicated,
+            'dropped': self.dropped,
+            'flushed': self.flushed,
+            'failed': self.failed,
+        }
+
+
+visit_buffer = VisitBuffer(
+    SessionLocal,
+    capacity=settings.VISIT_BUFFER_CAPACITY,
+    flush_size=settings.VISIT_FLUSH_SIZE,
+    flush_interval=settings.VISIT_FLUSH_INTERVAL_SECONDS,
+    dedup_seconds=settings.VISIT_DEDUP_SECONDS
+)
@@ -0,0 +1,128 @@
+import argparse
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, exists, func, or_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.interaction import ProfileVisit, ProfileVisitDaily
+from app.models.security import BlockedUser
+from utils.bulk import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+
+def rollup_visits(db: Session, visits: Sequence[Tuple[int, int, datetime]]):
+    """
+    Add (visitor, visited, visited_at) visits to the daily rollup. Visits are
+    aggregated per visited profile, visitor and UTC day first, so each rollup
+    row is upserted once.
+    """
+    days: Dict[Tuple[int, int, date], List] = defaultdict(lambda: [0, None])
+    for visitor, visited, visited_at in visits:
+        day = days[(visited, visitor, visited_at.astimezone(timezone.utc).date())]
+        day[0] += 1
+        day[1] = visited_at if day[1] is None else max(day[1], visited_at)
+
+    if not days:
+        return
+
+    insert = dialect_insert(db, ProfileVisitDaily)
+    db.execute(
+        insert.on_conflict_do_update(
+            index_elements=['visited_profile_user_id', 'visitor_user_id', 'visit_date'],
+            set_={
+                'visit_count': ProfileVisitDaily.visit_count + insert.excluded.visit_count,
+                'last_visit_at': case(
+                    (insert.excluded.last_visit_at > ProfileVisitDaily.last_visit_at, insert.excluded.last_visit_at),
+                    else_=ProfileVisitDaily.last_visit_at
+                ),
+                'updated_at': func.now(),
+            }
+        ),
+        [
+            {
+                'visited_profile_user_id': visited,
+                'visitor_user_id': visitor,
+                'visit_date': day,
+                'visit_count': count,
+                'last_visit_at': last_visit_at,
+            }
+            for (visited, visitor, day), (count, last_visit_at) in days.items()
+        ]
+    )
+
+
+def recent_visitors(db: Session, user_id: int, days: int = 30, limit: int = 20, offset: int = 0) -> List:
+    """
+    Visitors of `user_id`'s profile over the last `days` days (including
+    today), most recent first, as (visitor_user_id, visit_count, last_visit_at)
+    rows. Reads the daily rollup only; blocked users (either direction) are left out.
+    """
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    last_visit_at = func.max(ProfileVisitDaily.last_visit_at)
+
+    return db.query(
+        ProfileVisitDaily.visitor_user_id,
+        func.sum(ProfileVisitDaily.visit_count).label('visit_count'),
+        last_visit_at.label('last_visit_at')
+    ).filter(
+        ProfileVisitDaily.visited_profile_user_id == user_id,
+        ProfileVisitDaily.visit_date >= since,
+        ProfileVisitDaily.visitor_user_id != user_id,
+        ~exists().where(or_(
+            and_(BlockedUser.blocker_user_id == user_id,
+                 BlockedUser.blocked_user_id == ProfileVisitDaily.visitor_user_id),
+            and_(BlockedUser.blocker_user_id == ProfileVisitDaily.visitor_user_id,
+                 BlockedUser.blocked_user_id == user_id)
+        ))
+    ).group_by(
+        ProfileVisitDaily.visitor_user_id
+    ).order_by(
+        last_visit_at.desc(), ProfileVisitDaily.visitor_user_id
+    ).offset(offset).limit(limit).all()
+
+
+def purge_visits(db: Session, retention_days: int, batch_size: int = 10000) -> int:
+    """
+    Delete raw profile visits older than `retention_days`, `batch_size` rows
+    per transaction. The daily rollup is kept. Returns the number of rows deleted.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    purged = 0
+    while True:
+        visit_ids = [row[0] for row in db.query(ProfileVisit.visit_id).filter(
+            ProfileVisit.visit_timestamp < cutoff
+        ).limit(batch_size).all()]
+        if not visit_ids:
+            return purged
+
+        db.query(ProfileVisit).filter(ProfileVisit.visit_id.in_(visit_ids)).delete(synchronize_session=False)
+        db.commit()
+        purged += len(visit_ids)
+        logger.info("Purged %d profile visits older than %s", purged, cutoff.isoformat())
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Purge raw profile visits past the retention window")
+    parser.add_argument("--retention-days", type=int, default=settings.VISIT_RETENTION_DAYS,
+                        help="raw visits older than this are deleted (the daily rollup is kept)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="rows deleted per transaction")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    db = SessionLocal()
+    try:
+        purged = purge_visits(db, args.retention_days, args.batch_size)
+    finally:
+        db.close()
+    logger.info("Purged %d profile visits in total", purged)
+
+
+if __name__ == "__main__":
+    main()